@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the CPU Monitor process collectors
+Compares the psutil and /proc fast-path collectors at 1k, 5k and 20k processes
+(Linux only)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import psutil
+
+from cpu_monitor_core import AppMatcher, ProcessIndex, ProcfsCollector, PsutilCollector
+
+PROCESS_COUNTS = [1000, 5000, 20000]
+TICKS = 5
+
+
+def build_fake_procfs(root, process_count):
+    """Create a synthetic /proc tree with the files both collectors read"""
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  100000 0 50000 900000 0 0 0 0 0 0\n")
+        f.write("btime 1700000000\n")
+
+    for pid in range(1000, 1000 + process_count):
+        proc_dir = os.path.join(root, str(pid))
+        os.mkdir(proc_dir)
+        name = f"worker{pid % 50}"
+        # 50 fields after "(comm)", enough for psutil's stat parser
+        fields = ["S", "1", str(pid), str(pid), "0", "-1", "4194560", "100", "0", "0", "0",
+                  str(pid % 997), str(pid % 89), "0", "0", "20", "0", "1", "0", str(pid * 10)]
+        fields += ["0"] * (50 - len(fields))
+        with open(os.path.join(proc_dir, "stat"), "w") as f:
+            f.write(f"{pid} ({name}) {' '.join(fields)}\n")
+        with open(os.path.join(proc_dir, "comm"), "w") as f:
+            f.write(f"{name}\n")
+        with open(os.path.join(proc_dir, "cmdline"), "w") as f:
+            f.write(f"/opt/workers/{name}\0")
+        os.symlink(f"/opt/workers/{name}", os.path.join(proc_dir, "exe"))
+
+
+def time_collector(collector, apps):
+    """Return (discovery seconds, average steady tick seconds) for one collector"""
+    index = ProcessIndex(collector)
+    index.set_matcher(AppMatcher(apps))
+
+    start = time.perf_counter()
+    index.refresh()
+    discovery = time.perf_counter() - start
+
+    records = [record for app in apps for record in index.records_for(app["name"])]
+    index.sample(records)
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        index.refresh()
+        records = [record for app in apps for record in index.records_for(app["name"])]
+        index.sample(records)
+    tick = (time.perf_counter() - start) / TICKS
+
+    return discovery, tick, len(records)
+
+
+def run(proc_root, label):
+    # One in five synthetic workers is monitored
+    apps = [{"name": f"worker{i}", "match_type": "exact"} for i in range(0, 50, 5)]
+    psutil.PROCFS_PATH = proc_root
+
+    try:
+        for collector in (PsutilCollector(), ProcfsCollector(proc_root)):
+            discovery, tick, matched = time_collector(collector, apps)
+            print(f"{label:>12} {collector.name:>8} {matched:>9} {discovery * 1000:>14.1f} {tick * 1000:>12.1f}")
+    finally:
+        psutil.PROCFS_PATH = "/proc"
+
+
+def main():
+    if not ProcfsCollector.available():
+        print("The procfs collector needs Linux /proc - nothing to compare")
+        return 1
+
+    print("CPU Monitor1 - Collector Benchmark")
+    print("=" * 60)
+    print(f"{'processes':>12} {'backend':>8} {'monitored':>9} {'discovery ms':>14} {'tick ms':>12}")
+
+    for process_count in PROCESS_COUNTS:
+        root = tempfile.mkdtemp(prefix="fake_proc_")
+        try:
+            build_fake_procfs(root, process_count)
+            run(root, str(process_count))
+        finally:
+            shutil.rmtree(root)
+
+    if "--live" in sys.argv:
+        run("/proc", f"live {sum(name.isdigit() for name in os.listdir('/proc'))}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
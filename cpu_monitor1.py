@@ -2,26 +2,21 @@
 # Version 2.6 - Added Notification System
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import psutil
-import threading
 import time
-import json
-import os
-import subprocess
+from collections import deque
 from datetime import datetime
 import logging
-import sys
-from typing import List, Dict, Optional, Tuple
-import smtplib
 import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
-# Application version
-APP_VERSION = "2.6"
+from cpu_monitor_core import APP_VERSION, AppState, MonitorEngine, RestartGovernor
 
 
-class CPUMonitorApp:
+class CPUMonitorApp(MonitorEngine):
+    # How often queued log lines are flushed into the Activity Log widget
+    LOG_FLUSH_INTERVAL_MS = 250
+    # Treeview refresh requests are coalesced into at most one refresh per frame
+    TREE_REFRESH_INTERVAL_MS = 16
+
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
         self.root.title(f"Enhanced CPU Monitor & App Restarter v{APP_VERSION}")
@@ -29,40 +24,12 @@ class CPUMonitorApp:
         self.root.configure(bg="#2b2b2b")
         self.root.minsize(800, 1100)  # Increased minimum height
 
-        # Configure logging
-        logging.basicConfig(
-            filename="cpu_monitor.log",
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s"
-        )
-
-        # App state
-        self.monitoring = False
-        self.paused = False
-        self.monitor_thread = None
-        self.monitored_apps = []
-        self.cpu_threshold = 50.0
-        self.check_interval = 5.0
-        self.startup_delay = 3.0
-        self.monitoring_startup_delay = 10.0  # New: delay before monitoring starts
-        self.auto_restart_enabled = True
-        self.cpu_threshold_duration = 30.0  # New: time in seconds CPU must be above threshold before restarting
-        
-        # Notification settings
-        self.windows_notifications_enabled = True
-        self.email_notifications_enabled = False
-        self.sms_notifications_enabled = False
-        self.email_smtp_server = "smtp.gmail.com"
-        self.email_smtp_port = 587
-        self.email_username = ""
-        self.email_password = ""
-        self.email_recipients = []
-        self.sms_api_key = ""
-        self.sms_phone_numbers = []
-        
+        # Monitoring engine state and saved settings
+        super().__init__()
 
-        # Load saved settings
-        self.load_settings()
+        # Log lines from any thread, drained by the Tk thread in batches.
+        # deque.append/popleft are atomic, so producers never take a lock.
+        self.log_queue = deque(maxlen=self.log_max_lines)
 
         self.setup_ui()
         self.setup_styles()
@@ -290,6 +257,15 @@ class CPUMonitorApp:
                                                   selectcolor="#00ff88")
         sms_notifications_checkbox.pack(anchor="w")
 
+        # Settings edited while monitoring apply as soon as they are confirmed
+        for entry in (threshold_entry, interval_entry, startup_delay_entry, monitoring_startup_delay_entry,
+                      threshold_duration_entry):
+            entry.bind("<Return>", lambda event: self.apply_settings())
+            entry.bind("<FocusOut>", lambda event: self.apply_settings())
+        for checkbox in (restart_checkbox, windows_notifications_checkbox, email_notifications_checkbox,
+                         sms_notifications_checkbox):
+            checkbox.config(command=self.apply_settings)
+
         # App management frame
         app_frame = ttk.Frame(self.root, style="Custom.TFrame")
         app_frame.pack(fill="x", padx=20, pady=5)  # Reduced padding
@@ -337,15 +313,24 @@ class CPUMonitorApp:
                 bg="#3c3c3c").pack(anchor="w")
 
         # Create Treeview for apps with Enabled column
-        columns = ("App Name", "Process Name", "Status", "Enabled", "Last CPU %", "Restart Count", "Threshold Status")
+        columns = ("App Name", "Process Name", "Status", "Enabled", "Last CPU %", "Memory MB", "Handles", "Threads",
+                   "I/O MB/s", "Restart Count", "Threshold Status")
+        self.app_tree_columns = columns
         self.app_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=6)
 
+        # Treeview item id and last rendered values per app, for incremental refreshes
+        self.tree_items = {}
+        self.tree_values = {}
+        self.tree_refresh_pending = False
+
         for col in columns:
             self.app_tree.heading(col, text=col)
             if col == "Enabled":
                 self.app_tree.column(col, width=80, anchor="center")
             elif col == "Last CPU %":
                 self.app_tree.column(col, width=100, anchor="center")
+            elif col in ("Memory MB", "Handles", "Threads", "I/O MB/s"):
+                self.app_tree.column(col, width=75, anchor="center")
             elif col == "Restart Count":
                 self.app_tree.column(col, width=100, anchor="center")
             elif col == "Threshold Status":
@@ -495,6 +480,7 @@ class CPUMonitorApp:
         log_scrollbar = tk.Scrollbar(log_frame, orient="vertical", command=self.log_text.yview)
         log_scrollbar.pack(side="right", fill="y")
         self.log_text.configure(yscrollcommand=log_scrollbar.set)
+        self.root.after(self.LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
         # Load existing apps
         self.load_monitored_apps()
@@ -516,25 +502,12 @@ class CPUMonitorApp:
             messagebox.showerror("Error", "Please enter an application name")
             return
 
-        # Check if app already exists
-        for app in self.monitored_apps:
-            if app["name"] == app_name:
-                messagebox.showerror("Error", "Application already exists in the list")
-                return
-
-        # Add to monitored apps with enabled status
-        new_app = {
-            "name": app_name,
-            "process_name": app_name.lower(),
-            "status": "Active",
-            "enabled": True,
-            "last_cpu": 0.0,
-            "restart_count": 0,
-            "executable_path": None,
-            "threshold_exceeded_time": None  # Track when CPU threshold was first exceeded
-        }
-
-        self.monitored_apps.append(new_app)
+        # Add to monitored apps with enabled status (fails if the app already exists)
+        if not self.apps.add(AppState(app_name)):
+            messagebox.showerror("Error", "Application already exists in the list")
+            return
+
+        self.monitored_apps_changed()
         self.update_app_tree()
         self.app_name_var.set("")
         self.save_monitored_apps()
@@ -557,7 +530,8 @@ class CPUMonitorApp:
         
         if result:
             # Remove from list
-            self.monitored_apps = [app for app in self.monitored_apps if app["name"] != app_name]
+            self.apps.remove(app_name)
+            self.monitored_apps_changed()
             self.update_app_tree()
             self.save_monitored_apps()
             self.log_message(f"Removed application: {app_name}")
@@ -575,60 +549,129 @@ class CPUMonitorApp:
         self.log_message(f"Attempting to toggle status for: {app_name}")
 
         # Find and toggle the app
-        for app in self.monitored_apps:
-            if app["name"] == app_name:
-                old_status = app["enabled"]
-                app["enabled"] = not app["enabled"]
-                new_status = "enabled" if app["enabled"] else "disabled"
-                self.log_message(f"{app_name} monitoring changed from {old_status} to {new_status}")
-                self.update_app_tree()
-                self.save_monitored_apps()
-                break
+        with self.apps.edit(app_name) as app:
+            if app is not None:
+                old_status = app.enabled
+                app.enabled = not app.enabled
+        if app is not None:
+            new_status = "enabled" if app["enabled"] else "disabled"
+            self.log_message(f"{app_name} monitoring changed from {old_status} to {new_status}")
+            self.monitored_apps_changed()
+            self.update_app_tree()
+            self.save_monitored_apps()
         else:
             self.log_message(f"WARNING: Could not find app '{app_name}' in monitored apps list")
 
     def update_app_tree(self):
-        # Clear existing items
-        for item in self.app_tree.get_children():
-            self.app_tree.delete(item)
+        """Request a Treeview refresh; any number of requests within one frame share a single refresh"""
+        if not self.tree_refresh_pending:
+            self.tree_refresh_pending = True
+            self.root.after(self.TREE_REFRESH_INTERVAL_MS, self.refresh_app_tree)
 
-        # Add current apps
-        for app in self.monitored_apps:
-            enabled_text = "✓" if app.get("enabled", True) else "✗"
-            
-            # Determine threshold status
-            threshold_status = "Normal"
-            if app.get("threshold_exceeded_time") is not None:
-                current_time = time.time()
-                elapsed_time = current_time - app["threshold_exceeded_time"]
-                if elapsed_time >= self.cpu_threshold_duration:
-                    threshold_status = "🚨 RESTART NOW"
-                else:
-                    remaining_time = self.cpu_threshold_duration - elapsed_time
-                    threshold_status = f"⚠️ Warning ({remaining_time:.1f}s)"
-            
-            self.app_tree.insert("", "end", values=(
-                app["name"],
-                app["process_name"],
-                app["status"],
-                enabled_text,
-                f"{app['last_cpu']:.1f}%",
-                app["restart_count"],
-                threshold_status
-            ))
+    def app_row_values(self, app) -> tuple:
+        enabled_text = "✓" if app.get("enabled", True) else "✗"
+        
+        # Determine threshold status
+        threshold_status = "Normal"
+        window = self.threshold_windows.get(app["name"])
+        if app.get("threshold_exceeded_time") is not None and window is not None:
+            current_time = time.time()
+            policy = self.policy_for(app)
+            exceeded_for = current_time - app["threshold_exceeded_time"]
+            if (exceeded_for >= policy.cpu_threshold_duration and window.full(current_time, policy.cpu_threshold_duration)
+                    and self.window_predicates_met(window, policy)):
+                threshold_status = "🚨 RESTART NOW"
+            else:
+                remaining_time = max(0.0, policy.cpu_threshold_duration - exceeded_for)
+                threshold_status = f"⚠️ Warning ({window.fraction_over():.0%} over, {remaining_time:.1f}s)"
+        elif app["name"] in self.resource_exceeded_since:
+            threshold_status = "⚠️ Resource limit"
+
+        # Restart governor state takes precedence - it explains why nothing is restarting
+        governor = app.get("restart_governor")
+        if isinstance(governor, dict) and governor.get("circuit") == "open":
+            threshold_status = "⛔ Circuit open"
+        elif isinstance(governor, dict) and governor.get("circuit") == "half-open":
+            threshold_status = "🔁 Trial restart"
+        elif app["status"] == "Backoff":
+            retry_in = self.restart_governor.next_allowed(RestartGovernor.state_for(app)) - time.time()
+            threshold_status = f"⏳ Backoff ({max(0.0, retry_in):.0f}s)"
+
+        # Resource columns stay blank until the app has been sampled with resource metrics on
+        resources = self.app_resources.get(app["name"]) if self.resource_metrics_enabled else None
+        if resources is not None:
+            memory_text = f"{resources.rss / 1048576:.0f}"
+            if resources.uss is not None:
+                memory_text += f" ({resources.uss / 1048576:.0f})"
+            resource_values = (memory_text, resources.fds, resources.threads,
+                               f"{(resources.read_rate + resources.write_rate) / 1048576:.1f}")
+        else:
+            resource_values = ("", "", "", "")
+
+        return (
+            app["name"],
+            app["process_name"],
+            app["status"],
+            enabled_text,
+            f"{app['last_cpu']:.1f}%",
+            *resource_values,
+            app["restart_count"],
+            threshold_status
+        )
 
-    def start_monitoring(self):
+    def refresh_app_tree(self):
+        """Bring the Treeview in line with monitored_apps, touching only rows and cells that changed"""
+        self.tree_refresh_pending = False
+        rows = {app["name"]: self.app_row_values(app) for app in self.monitored_apps}
+
+        # Drop rows for removed apps
+        for app_name in [app_name for app_name in self.tree_items if app_name not in rows]:
+            self.app_tree.delete(self.tree_items.pop(app_name))
+            del self.tree_values[app_name]
+
+        for index, (app_name, values) in enumerate(rows.items()):
+            item = self.tree_items.get(app_name)
+            if item is None:
+                self.tree_items[app_name] = self.app_tree.insert("", index, values=values)
+            else:
+                for column, old_value, new_value in zip(self.app_tree_columns, self.tree_values[app_name], values):
+                    if old_value != new_value:
+                        self.app_tree.set(item, column, new_value)
+            self.tree_values[app_name] = values
+
+    def read_settings(self) -> bool:
+        """Copy the settings fields into the engine; False if a number doesn't parse"""
         try:
-            self.cpu_threshold = float(self.threshold_var.get())
-            self.check_interval = float(self.interval_var.get())
-            self.startup_delay = float(self.startup_delay_var.get())
-            self.monitoring_startup_delay = float(self.monitoring_startup_delay_var.get())
-            self.cpu_threshold_duration = float(self.threshold_duration_var.get())
-            self.auto_restart_enabled = self.auto_restart_var.get()
-            self.windows_notifications_enabled = self.windows_notifications_var.get()
-            self.email_notifications_enabled = self.email_notifications_var.get()
-            self.sms_notifications_enabled = self.sms_notifications_var.get()
+            cpu_threshold = float(self.threshold_var.get())
+            check_interval = float(self.interval_var.get())
+            startup_delay = float(self.startup_delay_var.get())
+            monitoring_startup_delay = float(self.monitoring_startup_delay_var.get())
+            cpu_threshold_duration = float(self.threshold_duration_var.get())
         except ValueError:
+            return False
+
+        self.cpu_threshold = cpu_threshold
+        self.check_interval = check_interval
+        self.startup_delay = startup_delay
+        self.monitoring_startup_delay = monitoring_startup_delay
+        self.cpu_threshold_duration = cpu_threshold_duration
+        self.auto_restart_enabled = self.auto_restart_var.get()
+        self.windows_notifications_enabled = self.windows_notifications_var.get()
+        self.email_notifications_enabled = self.email_notifications_var.get()
+        self.sms_notifications_enabled = self.sms_notifications_var.get()
+        return True
+
+    def apply_settings(self):
+        """Push edited settings to the running engine"""
+        if not self.monitoring:
+            return
+        if not self.read_settings():
+            self.log_message("Ignoring settings change - threshold, interval, delays and duration must be numbers")
+            return
+        self.settings_changed()
+
+    def start_monitoring(self):
+        if not self.read_settings():
             messagebox.showerror("Error", "Please enter valid numbers for threshold, interval, delays, and duration")
             return
 
@@ -645,66 +688,38 @@ class CPUMonitorApp:
         self.monitoring = True
         self.paused = False
         
-        # Apply monitoring startup delay to allow CPU to normalize
+        # Apply monitoring startup delay to allow CPU to normalize - the engine waits it out on its loop
         if self.monitoring_startup_delay > 0:
             self.status_label.config(text=f"Status: Starting monitoring in {self.monitoring_startup_delay}s...", fg="#ffaa00")
             self.log_message(f"Starting monitoring in {self.monitoring_startup_delay} seconds to allow CPU to normalize...")
-            
-            # Start monitoring thread after delay
-            def delayed_start():
-                time.sleep(self.monitoring_startup_delay)
-                if self.monitoring:  # Check if still monitoring (not stopped)
-                    self.root.after(0, self.start_monitoring_thread)
-            
-            threading.Thread(target=delayed_start, daemon=True).start()
-        else:
-            self.start_monitoring_thread()
+        self.start_engine(self.monitoring_startup_delay)
         
         self.start_btn.config(state="disabled")
         self.pause_btn.config(state="normal")
         self.stop_btn.config(state="normal")
 
-    def start_monitoring_thread(self):
-        """Start the actual monitoring thread"""
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
-        self.status_label.config(text="Status: Monitoring Active", fg="#00ff88")
-        self.log_message("Started CPU monitoring")
-
     def pause_monitoring(self):
         if self.paused:
             # Resume monitoring
-            self.paused = False
+            self.resume_engine()
             self.pause_btn.config(text="Pause Monitoring", bg="#ffaa00")
             self.status_label.config(text="Status: Monitoring Active", fg="#00ff88")
             self.log_message("Resumed CPU monitoring")
         else:
             # Pause monitoring
-            self.paused = True
+            self.pause_engine()
             self.pause_btn.config(text="Resume Monitoring", bg="#00aa44")
             self.status_label.config(text="Status: Monitoring Paused", fg="#ffaa00")
             self.log_message("Paused CPU monitoring")
 
     def stop_monitoring(self):
-        self.monitoring = False
-        self.paused = False
+        self.stop_engine()
         self.start_btn.config(state="normal")
         self.pause_btn.config(state="disabled")
         self.stop_btn.config(state="disabled")
         self.status_label.config(text="Status: Stopped", fg="#ff4444")
         self.log_message("Stopped CPU monitoring")
 
-    def monitor_loop(self):
-        while self.monitoring:
-            try:
-                if not self.paused:
-                    self.check_apps_cpu()
-                    self.root.after(0, self.update_monitoring_info)
-                time.sleep(self.check_interval)
-            except Exception as e:
-                self.log_message(f"Error in monitoring loop: {str(e)}")
-                logging.error(f"Monitoring loop error: {str(e)}")
-
     def update_monitoring_info(self):
         if self.monitoring and not self.paused:
             enabled_count = len([app for app in self.monitored_apps if app.get("enabled", True)])
@@ -717,7 +732,7 @@ class CPUMonitorApp:
                     warning_count += 1
             
             status_text = f"Monitoring {enabled_count}/{total_count} applications | "
-            status_text += f"Check interval: {self.check_interval}s | "
+            status_text += f"Check interval: {self.check_interval}s (adaptive {self.fast_check_interval}-{self.max_check_interval}s) | "
             status_text += f"CPU threshold: {self.cpu_threshold}% | "
             status_text += f"Threshold duration: {self.cpu_threshold_duration}s"
             
@@ -730,416 +745,6 @@ class CPUMonitorApp:
         else:
             self.monitoring_info_label.config(text="")
 
-    def check_apps_cpu(self):
-        for app in self.monitored_apps:
-            # Skip disabled apps
-            if not app.get("enabled", True):
-                continue
-                
-            try:
-                cpu_percent, process_count = self.get_app_cpu_usage_detailed(app["name"])
-                app["last_cpu"] = cpu_percent
-
-                # Check if application is terminated and auto-restart is enabled
-                if process_count == 0 and self.auto_restart_enabled:
-                    if app["status"] != "Terminated":
-                        app["status"] = "Terminated"
-                        self.log_message(f"DETECTED: {app['name']} has been terminated")
-                        self.restart_terminated_app(app)
-
-                # Check if CPU exceeds threshold
-                elif cpu_percent > self.cpu_threshold:
-                    current_time = time.time()
-                    
-                    # If this is the first time exceeding threshold, record the time
-                    if app.get("threshold_exceeded_time") is None:
-                        app["threshold_exceeded_time"] = current_time
-                        self.log_message(f"WARNING: {app['name']} CPU usage: {cpu_percent:.1f}% (exceeds {self.cpu_threshold}%) - Starting threshold timer")
-                    
-                    # Check if CPU has been above threshold for the required duration
-                    elif current_time - app["threshold_exceeded_time"] >= self.cpu_threshold_duration:
-                        self.log_message(f"CRITICAL: {app['name']} CPU usage: {cpu_percent:.1f}% (exceeds {self.cpu_threshold}% for {self.cpu_threshold_duration}s) - Restarting")
-                        self.restart_app(app)
-                        # Reset the timer after restart
-                        app["threshold_exceeded_time"] = None
-                    else:
-                        # Still above threshold but not long enough
-                        remaining_time = self.cpu_threshold_duration - (current_time - app["threshold_exceeded_time"])
-                        self.log_message(f"WARNING: {app['name']} CPU usage: {cpu_percent:.1f}% (exceeds {self.cpu_threshold}%) - {remaining_time:.1f}s remaining before restart")
-                
-                # If CPU is below threshold, reset the timer
-                elif app.get("threshold_exceeded_time") is not None:
-                    app["threshold_exceeded_time"] = None
-                    self.log_message(f"INFO: {app['name']} CPU usage normalized: {cpu_percent:.1f}% (below {self.cpu_threshold}%)")
-
-                # Update status if app is running normally
-                elif process_count > 0 and app["status"] in ["Terminated", "Restarting"]:
-                    app["status"] = "Active"
-
-            except Exception as e:
-                self.log_message(f"Error checking {app['name']}: {str(e)}")
-                logging.error(f"Error checking {app['name']}: {str(e)}")
-
-        # Update UI
-        self.root.after(0, self.update_app_tree)
-
-    def get_app_cpu_usage_detailed(self, app_name: str) -> Tuple[float, int]:
-        total_cpu = 0.0
-        process_count = 0
-
-        for proc in psutil.process_iter(["pid", "name", "cpu_percent", "exe"]):
-            try:
-                # Safely get process info with null checks
-                proc_name = proc.info.get("name")
-                proc_exe = proc.info.get("exe")
-                
-                # Skip processes with no name
-                if not proc_name:
-                    continue
-                
-                proc_name_lower = proc_name.lower()
-                proc_exe_lower = proc_exe.lower() if proc_exe else ""
-                
-                # Check if process name matches or if executable path contains the app name
-                if (app_name.lower() in proc_name_lower or 
-                    (proc_exe_lower and app_name.lower() in proc_exe_lower)):
-                    
-                    # Get CPU usage with proper initialization (CPU only, excluding GPU)
-                    try:
-                        # First call to initialize (returns 0.0)
-                        proc.cpu_percent()
-                        # Wait a bit for the next call to be accurate
-                        time.sleep(0.1)
-                        # Second call should give us the actual CPU usage
-                        raw_cpu = proc.cpu_percent()
-                        
-                        # Use raw CPU usage
-                        cpu = raw_cpu
-                        
-                        total_cpu += cpu
-                        process_count += 1
-                        
-                        # Log for debugging
-                        if cpu > 0:
-                            self.log_message(f"Process {proc_name} (PID: {proc.info['pid']}) CPU: {cpu:.1f}% (filtered from {raw_cpu:.1f}%)")
-                            
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-
-        return total_cpu, process_count
-        
-
-    def restart_app(self, app):
-        try:
-            app_name = app["name"]
-            process_name = app.get("process_name", app_name)
-            self.log_message(f"Attempting to restart {app_name}...")
-
-            # Kill existing processes - try multiple ways to find the process
-            killed_count = 0
-            for proc in psutil.process_iter(["pid", "name", "exe"]):
-                try:
-                    # Safely get process info with null checks
-                    proc_name = proc.info.get("name")
-                    proc_exe = proc.info.get("exe")
-                    
-                    # Skip processes with no name
-                    if not proc_name:
-                        continue
-                    
-                    proc_name_lower = proc_name.lower()
-                    proc_exe_lower = proc_exe.lower() if proc_exe else ""
-                    
-                    # Check if process name matches or if executable path contains the app name
-                    if (app_name.lower() in proc_name_lower or 
-                        process_name.lower() in proc_name_lower or
-                        (proc_exe_lower and app_name.lower() in proc_exe_lower)):
-                        
-                        self.log_message(f"Found process: {proc_name} (PID: {proc.info['pid']})")
-                        proc.terminate()
-                        killed_count += 1
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            if killed_count > 0:
-                self.log_message(f"Terminated {killed_count} {app_name} process(es)")
-
-                # Wait for processes to fully terminate, then apply startup delay
-                time.sleep(2)
-                self.log_message(f"Waiting {self.startup_delay} seconds before restarting {app_name}...")
-                time.sleep(self.startup_delay)
-
-                # Try to restart the application
-                restart_success = False
-                
-                # First try executable path if available
-                if app.get("executable_path") and os.path.exists(app["executable_path"]):
-                    try:
-                        subprocess.Popen([app["executable_path"]],
-                                       creationflags=subprocess.CREATE_NEW_CONSOLE)
-                        self.log_message(f"Restarted {app_name} from executable path: {app['executable_path']}")
-                        restart_success = True
-                    except Exception as e:
-                        self.log_message(f"Failed to restart from executable path: {str(e)}")
-                
-                # If executable path failed, try common locations
-                if not restart_success:
-                    common_paths = [
-                        f"C:\\Program Files\\{app_name}\\{app_name}.exe",
-                        f"C:\\Program Files (x86)\\{app_name}\\{app_name}.exe",
-                        f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\{app_name}\\{app_name}.exe",
-                        f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Roaming\\{app_name}\\{app_name}.exe"
-                    ]
-                    
-                    for path in common_paths:
-                        if os.path.exists(path):
-                            try:
-                                subprocess.Popen([path], creationflags=subprocess.CREATE_NEW_CONSOLE)
-                                self.log_message(f"Restarted {app_name} from common path: {path}")
-                                restart_success = True
-                                # Update the executable path for future use
-                                app["executable_path"] = path
-                                break
-                            except Exception as e:
-                                self.log_message(f"Failed to restart from {path}: {str(e)}")
-                
-                # Last resort: try to start by name
-                if not restart_success:
-                    try:
-                        subprocess.Popen([app_name], creationflags=subprocess.CREATE_NEW_CONSOLE)
-                        self.log_message(f"Restarted {app_name} by name (last resort)")
-                        restart_success = True
-                    except Exception as e:
-                        self.log_message(f"Failed to restart {app_name} by name: {str(e)}")
-
-                if restart_success:
-                    app["restart_count"] += 1
-                    app["status"] = "Restarted"
-                    
-                    # Send notifications
-                    self.send_all_notifications(app_name, "cpu_threshold", app['last_cpu'])
-                    
-                    # Show notification
-                    messagebox.showinfo("App Restarted",
-                                      f"{app_name} has been restarted due to high CPU usage ({app['last_cpu']:.1f}%)")
-                else:
-                    app["status"] = "Restart Failed"
-                    self.log_message(f"Failed to restart {app_name} - all methods exhausted")
-
-            else:
-                self.log_message(f"No {app_name} process(es) found to restart")
-
-        except Exception as e:
-            error_msg = f"Error restarting {app['name']}: {str(e)}"
-            self.log_message(error_msg)
-            logging.error(error_msg)
-
-    def restart_terminated_app(self, app):
-        try:
-            app_name = app["name"]
-            app["status"] = "Restarting"
-            self.log_message(f"Auto-restarting terminated application: {app_name}")
-
-            # Apply startup delay before restarting
-            if self.startup_delay > 0:
-                self.log_message(f"Waiting {self.startup_delay} seconds before restarting {app_name}...")
-                time.sleep(self.startup_delay)
-
-            # Try to restart the application using the same logic as manual restart
-            restart_success = False
-            
-            # First try executable path if available
-            if app.get("executable_path") and os.path.exists(app["executable_path"]):
-                try:
-                    subprocess.Popen([app["executable_path"]],
-                                   creationflags=subprocess.CREATE_NEW_CONSOLE)
-                    self.log_message(f"Auto-restarted {app_name} from executable path: {app['executable_path']}")
-                    restart_success = True
-                except Exception as e:
-                    self.log_message(f"Failed to auto-restart from executable path: {str(e)}")
-            
-            # If executable path failed, try common locations
-            if not restart_success:
-                common_paths = [
-                    f"C:\\Program Files\\{app_name}\\{app_name}.exe",
-                    f"C:\\Program Files (x86)\\{app_name}\\{app_name}.exe",
-                    f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\{app_name}\\{app_name}.exe",
-                    f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Roaming\\{app_name}\\{app_name}.exe"
-                ]
-                
-                for path in common_paths:
-                    if os.path.exists(path):
-                        try:
-                            subprocess.Popen([path], creationflags=subprocess.CREATE_NEW_CONSOLE)
-                            self.log_message(f"Auto-restarted {app_name} from common path: {path}")
-                            restart_success = True
-                            # Update the executable path for future use
-                            app["executable_path"] = path
-                            break
-                        except Exception as e:
-                            self.log_message(f"Failed to auto-restart from {path}: {str(e)}")
-            
-            # Last resort: try to start by name
-            if not restart_success:
-                try:
-                    subprocess.Popen([app_name], creationflags=subprocess.CREATE_NEW_CONSOLE)
-                    self.log_message(f"Auto-restarted {app_name} by name (last resort)")
-                    restart_success = True
-                except Exception as e:
-                    self.log_message(f"Failed to auto-restart {app_name} by name: {str(e)}")
-
-            if restart_success:
-                app["restart_count"] += 1
-                app["status"] = "Auto-Restarted"
-                
-                # Send notifications
-                self.send_all_notifications(app_name, "auto_restart")
-                
-                # Show notification
-                messagebox.showinfo("App Auto-Restarted",
-                                  f"{app_name} was terminated and has been automatically restarted")
-            else:
-                app["status"] = "Auto-Restart Failed"
-                self.log_message(f"Failed to auto-restart {app_name} - all methods exhausted")
-
-        except Exception as e:
-            error_msg = f"Error auto-restarting {app['name']}: {str(e)}"
-            self.log_message(error_msg)
-            logging.error(error_msg)
-            app["status"] = "Auto-Restart Failed"
-
-    def find_executable_path(self, app_name):
-        """Find the executable path for a given application name"""
-        try:
-            # First check if it's already in PATH
-            try:
-                result = subprocess.run(['where', app_name], capture_output=True, text=True, shell=True)
-                if result.returncode == 0:
-                    paths = result.stdout.strip().split('\n')
-                    if paths:
-                        return paths[0]  # Return the first found path
-            except:
-                pass
-            
-            # Check common installation directories
-            common_paths = [
-                f"C:\\Program Files\\{app_name}\\{app_name}.exe",
-                f"C:\\Program Files (x86)\\{app_name}\\{app_name}.exe",
-                f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\{app_name}\\{app_name}.exe",
-                f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Roaming\\{app_name}\\{app_name}.exe",
-                f"C:\\Program Files\\{app_name.capitalize()}\\{app_name.capitalize()}.exe",
-                f"C:\\Program Files (x86)\\{app_name.capitalize()}\\{app_name.capitalize()}.exe"
-            ]
-            
-            for path in common_paths:
-                if os.path.exists(path):
-                    return path
-            
-            # Try to find by searching running processes
-            for proc in psutil.process_iter(["pid", "name", "exe"]):
-                try:
-                    proc_name = proc.info.get("name")
-                    if proc_name and app_name.lower() in proc_name.lower():
-                        exe_path = proc.info.get("exe")
-                        if exe_path and os.path.exists(exe_path):
-                            return exe_path
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            return None
-            
-        except Exception as e:
-            self.log_message(f"Error finding executable for {app_name}: {str(e)}")
-            return None
-
-    def discover_executable_paths(self):
-        """Automatically discover and update executable paths for all monitored apps"""
-        print("DEBUG: discover_executable_paths method called")  # Immediate console output
-        self.log_message("Discovering executable paths for monitored applications...")
-        
-        for app in self.monitored_apps:
-            if not app.get("executable_path"):
-                exe_path = self.find_executable_path(app["name"])
-                if exe_path:
-                    app["executable_path"] = exe_path
-                    self.log_message(f"Found executable for {app['name']}: {exe_path}")
-                else:
-                    self.log_message(f"Could not find executable for {app['name']}")
-        
-        # Save the updated configuration
-        self.save_monitored_apps()
-        self.update_app_tree()
-        self.log_message("Executable discovery completed!")
-
-    def debug_cpu_monitoring(self):
-        """Debug CPU monitoring for all apps"""
-        print("DEBUG: debug_cpu_monitoring method called")  # Immediate console output
-        self.log_message("=== DEBUG: CPU Monitoring Test ===")
-        self.log_message(f"Current settings: CPU threshold: {self.cpu_threshold}%, Duration: {self.cpu_threshold_duration}s")
-        
-        for app in self.monitored_apps:
-            if app.get("enabled", True):
-                self.log_message(f"Testing CPU monitoring for: {app['name']}")
-                cpu_percent, process_count = self.get_app_cpu_usage_detailed(app["name"])
-                self.log_message(f"  Found {process_count} processes, Total CPU: {cpu_percent:.1f}%")
-                
-                # Update the app's CPU value for display
-                app["last_cpu"] = cpu_percent
-                
-                # Check if we can find the process by name
-                found_by_name = False
-                for proc in psutil.process_iter(["pid", "name"]):
-                    try:
-                        proc_name = proc.info.get("name")
-                        if proc_name and app["name"].lower() in proc_name.lower():
-                            found_by_name = True
-                            self.log_message(f"  Found by name: {proc_name} (PID: {proc.info['pid']})")
-                            break
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                if not found_by_name:
-                    self.log_message(f"  WARNING: Could not find process by name '{app['name']}'")
-                
-                # Check if we can find the process by process_name
-                if app.get("process_name"):
-                    found_by_process_name = False
-                    for proc in psutil.process_iter(["pid", "name"]):
-                        try:
-                            proc_name = proc.info.get("name")
-                            if proc_name and app["process_name"].lower() in proc_name.lower():
-                                found_by_process_name = True
-                                self.log_message(f"  Found by process_name: {proc_name} (PID: {proc.info['pid']})")
-                                break
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                    
-                    if not found_by_process_name:
-                        self.log_message(f"  WARNING: Could not find process by process_name '{app['process_name']}'")
-        
-        # Update the display
-        self.update_app_tree()
-        self.log_message("=== DEBUG: CPU Monitoring Test Complete ===")
-
-    def set_executable_path(self, app_name, executable_path):
-        """Manually set the executable path for a specific application"""
-        for app in self.monitored_apps:
-            if app["name"] == app_name:
-                if os.path.exists(executable_path):
-                    app["executable_path"] = executable_path
-                    self.log_message(f"Set executable path for {app_name}: {executable_path}")
-                    self.save_monitored_apps()
-                    self.update_app_tree()
-                    return True
-                else:
-                    self.log_message(f"Executable path does not exist: {executable_path}")
-                    return False
-        return False
-
     def show_app_context_menu(self, event):
         """Show context menu for app tree items"""
         selection = self.app_tree.selection()
@@ -1156,6 +761,8 @@ class CPUMonitorApp:
                                command=lambda: self.prompt_executable_path(app_name))
         context_menu.add_command(label=f"Reset Threshold Timer for {app_name}", 
                                command=lambda: self.reset_threshold_timer(app_name))
+        context_menu.add_command(label=f"Reset Restart Backoff for {app_name}",
+                               command=lambda: self.reset_restart_governor(app_name))
         context_menu.add_separator()
         context_menu.add_command(label=f"Remove {app_name}", 
                                command=lambda: self.remove_app_by_name(app_name))
@@ -1176,19 +783,6 @@ class CPUMonitorApp:
         if executable_path:
             self.set_executable_path(app_name, executable_path)
 
-    def reset_threshold_timer(self, app_name):
-        """Reset the threshold timer for a specific application"""
-        for app in self.monitored_apps:
-            if app["name"] == app_name:
-                if app.get("threshold_exceeded_time") is not None:
-                    app["threshold_exceeded_time"] = None
-                    self.log_message(f"Reset threshold timer for {app_name}")
-                    self.update_app_tree()
-                    self.save_monitored_apps()
-                else:
-                    self.log_message(f"No active threshold timer for {app_name}")
-                break
-
     def remove_app_by_name(self, app_name):
         """Remove app by name (for context menu)"""
         # Show confirmation dialog
@@ -1199,34 +793,61 @@ class CPUMonitorApp:
         
         if result:
             # Remove from list
-            self.monitored_apps = [app for app in self.monitored_apps if app["name"] != app_name]
+            self.apps.remove(app_name)
+            self.monitored_apps_changed()
             self.update_app_tree()
             self.save_monitored_apps()
             self.log_message(f"Removed application: {app_name}")
 
-    def log_message(self, message: str) -> None:
+    def apps_updated(self) -> None:
+        self.root.after(0, self.update_app_tree)
+
+    def status_updated(self) -> None:
+        self.root.after(0, self.update_monitoring_info)
+
+    def monitoring_started(self) -> None:
+        super().monitoring_started()
+        self.root.after(0, lambda: self.status_label.config(text="Status: Monitoring Active", fg="#00ff88"))
+
+    def notify_user(self, title: str, message: str) -> None:
+        # Restarts run on the engine loop thread, so hand the dialog to Tk
+        self.root.after(0, lambda: messagebox.showinfo(title, message))
+
+    def log_message(self, message: str, level: int = logging.INFO) -> None:
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
         
         # Also print to console for debugging
-        print(f"LOG: {log_entry.strip()}")
+        if self.console_log_enabled:
+            print(f"LOG: {log_entry.strip()}")
         
-        # Update log in main thread with error handling
+        # Picked up by flush_log_queue on the Tk thread
+        self.log_queue.append(log_entry)
+
+    def flush_log_queue(self):
+        """Move everything queued since the last flush into the log widget in one insert"""
+        entries = []
         try:
-            self.root.after(0, lambda: self.update_log(log_entry))
-        except Exception as e:
-            print(f"Error in log_message: {e}")
-            # Fallback: try to update log directly
-            try:
-                self.update_log(log_entry)
-            except Exception as e2:
-                print(f"Fallback log update also failed: {e2}")
+            while True:
+                entries.append(self.log_queue.popleft())
+        except IndexError:
+            pass
 
+        if entries:
+            self.update_log("".join(entries[-self.log_max_lines:]))
+        self.root.after(self.LOG_FLUSH_INTERVAL_MS, self.flush_log_queue)
 
     def update_log(self, log_entry):
         try:
             if hasattr(self, 'log_text') and self.log_text:
                 self.log_text.insert(tk.END, log_entry)
+
+                # Keep only the last log_max_lines lines so the widget stays small
+                # (every entry ends in a newline, so the last line is always empty)
+                line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+                if line_count > self.log_max_lines:
+                    self.log_text.delete("1.0", f"{line_count - self.log_max_lines + 1}.0")
+
                 self.log_text.see(tk.END)  # Auto-scroll to bottom
             else:
                 print(f"WARNING: log_text not available, message: {log_entry.strip()}")
@@ -1234,177 +855,12 @@ class CPUMonitorApp:
             print(f"Error in update_log: {e}")
             print(f"Failed to log: {log_entry.strip()}")
 
-    def save_settings(self):
-        settings = {
-            "cpu_threshold": self.cpu_threshold,
-            "check_interval": self.check_interval,
-            "startup_delay": self.startup_delay,
-            "monitoring_startup_delay": self.monitoring_startup_delay,
-            "cpu_threshold_duration": self.cpu_threshold_duration,
-            "auto_restart_enabled": self.auto_restart_enabled,
-            "windows_notifications_enabled": self.windows_notifications_enabled,
-            "email_notifications_enabled": self.email_notifications_enabled,
-            "sms_notifications_enabled": self.sms_notifications_enabled,
-            "email_smtp_server": self.email_smtp_server,
-            "email_smtp_port": self.email_smtp_port,
-            "email_username": self.email_username,
-            "email_password": self.email_password,
-            "email_recipients": self.email_recipients,
-            "sms_api_key": self.sms_api_key,
-            "sms_phone_numbers": self.sms_phone_numbers
-        }
-
-        try:
-            with open("settings.json", "w") as f:
-                json.dump(settings, f)
-        except Exception as e:
-            logging.error(f"Error saving settings: {str(e)}")
-
-    def load_settings(self):
-        try:
-            if os.path.exists("settings.json"):
-                with open("settings.json", "r") as f:
-                    settings = json.load(f)
-                    self.cpu_threshold = settings.get("cpu_threshold", 50.0)
-                    self.check_interval = settings.get("check_interval", 5.0)
-                    self.startup_delay = settings.get("startup_delay", 3.0)
-                    self.monitoring_startup_delay = settings.get("monitoring_startup_delay", 10.0)
-                    self.cpu_threshold_duration = settings.get("cpu_threshold_duration", 30.0)
-                    self.auto_restart_enabled = settings.get("auto_restart_enabled", True)
-                    self.windows_notifications_enabled = settings.get("windows_notifications_enabled", True)
-                    self.email_notifications_enabled = settings.get("email_notifications_enabled", False)
-                    self.sms_notifications_enabled = settings.get("sms_notifications_enabled", False)
-                    self.email_smtp_server = settings.get("email_smtp_server", "smtp.gmail.com")
-                    self.email_smtp_port = settings.get("email_smtp_port", 587)
-                    self.email_username = settings.get("email_username", "")
-                    self.email_password = settings.get("email_password", "")
-                    self.email_recipients = settings.get("email_recipients", [])
-                    self.sms_api_key = settings.get("sms_api_key", "")
-                    self.sms_phone_numbers = settings.get("sms_phone_numbers", [])
-        except Exception as e:
-            logging.error(f"Error loading settings: {str(e)}")
-
-    def save_monitored_apps(self):
-        try:
-            with open("monitored_apps.json", "w") as f:
-                json.dump(self.monitored_apps, f)
-        except Exception as e:
-            logging.error(f"Error saving monitored apps: {str(e)}")
-
-    def load_monitored_apps(self):
-        try:
-            if os.path.exists("monitored_apps.json"):
-                with open("monitored_apps.json", "r") as f:
-                    self.monitored_apps = json.load(f)
-                    # Ensure all apps have the required fields
-                    for app in self.monitored_apps:
-                        if "enabled" not in app:
-                            app["enabled"] = True
-                        if "threshold_exceeded_time" not in app:
-                            app["threshold_exceeded_time"] = None
-                    self.update_app_tree()
-        except Exception as e:
-            logging.error(f"Error loading monitored apps: {str(e)}")
-
-    def send_windows_notification(self, title: str, message: str) -> None:
-        """Send Windows toast notification"""
-        try:
-            if self.windows_notifications_enabled:
-                # Use Windows 10/11 toast notifications
-                import winsound
-                import ctypes
-                from ctypes import wintypes
-                
-                # Play notification sound
-                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
-                
-                # Show Windows notification
-                ctypes.windll.user32.MessageBoxW(0, message, title, 0x40)  # 0x40 = MB_ICONINFORMATION
-                
-        except Exception as e:
-            self.log_message(f"Failed to send Windows notification: {str(e)}")
-
-    def send_email_notification(self, subject: str, message: str) -> None:
-        """Send email notification"""
-        try:
-            if not self.email_notifications_enabled or not self.email_username or not self.email_password:
-                return
-                
-            msg = MIMEMultipart()
-            msg['From'] = self.email_username
-            msg['To'] = ", ".join(self.email_recipients)
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(message, 'plain'))
-            
-            server = smtplib.SMTP(self.email_smtp_server, self.email_smtp_port)
-            server.starttls()
-            server.login(self.email_username, self.email_password)
-            
-            text = msg.as_string()
-            server.sendmail(self.email_username, self.email_recipients, text)
-            server.quit()
-            
-            self.log_message(f"Email notification sent to {len(self.email_recipients)} recipients")
-            
-        except Exception as e:
-            self.log_message(f"Failed to send email notification: {str(e)}")
-
-    def send_sms_notification(self, message: str) -> None:
-        """Send SMS notification using Twilio API"""
-        try:
-            if not self.sms_notifications_enabled or not self.sms_api_key:
-                return
-                
-            # Using Twilio API (you'll need to install: pip install twilio)
-            from twilio.rest import Client
-            
-            # Twilio credentials (you'll need to set these up)
-            account_sid = self.sms_api_key  # This should be your Twilio Account SID
-            auth_token = ""  # You'll need to add this to settings
-            
-            client = Client(account_sid, auth_token)
-            
-            for phone_number in self.sms_phone_numbers:
-                message_obj = client.messages.create(
-                    body=message,
-                    from_='+1234567890',  # Your Twilio phone number
-                    to=phone_number
-                )
-                
-            self.log_message(f"SMS notification sent to {len(self.sms_phone_numbers)} numbers")
-            
-        except ImportError:
-            self.log_message("Twilio not installed. Install with: pip install twilio")
-        except Exception as e:
-            self.log_message(f"Failed to send SMS notification: {str(e)}")
-
-    def send_all_notifications(self, app_name: str, restart_type: str, cpu_usage: float = 0.0) -> None:
-        """Send all enabled notifications for app restart"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        if restart_type == "cpu_threshold":
-            title = f"App Restarted - {app_name}"
-            message = f"{app_name} was restarted due to high CPU usage ({cpu_usage:.1f}%) at {timestamp}"
-        else:
-            title = f"App Auto-Restarted - {app_name}"
-            message = f"{app_name} was automatically restarted after being terminated at {timestamp}"
-        
-        # Send notifications in separate threads to avoid blocking
-        if self.windows_notifications_enabled:
-            threading.Thread(target=self.send_windows_notification, args=(title, message), daemon=True).start()
-        
-        if self.email_notifications_enabled:
-            threading.Thread(target=self.send_email_notification, args=(title, message), daemon=True).start()
-        
-        if self.sms_notifications_enabled:
-            threading.Thread(target=self.send_sms_notification, args=(message,), daemon=True).start()
-
     def on_closing(self):
         if self.monitoring:
             self.stop_monitoring()
         self.save_settings()
         self.save_monitored_apps()
+        self.shutdown()
         self.root.destroy()
 
 def main():
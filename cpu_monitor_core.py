@@ -0,0 +1,3193 @@
+# CPU Monitor core - monitoring, threshold and restart engine without any GUI dependency
+# Used by the Tk app in cpu_monitor1.py and by the headless daemon (run_cpu_monitor_main.py --headless)
+import psutil
+import asyncio
+import threading
+import time
+import json
+import os
+import subprocess
+import queue
+from datetime import datetime
+import logging
+import signal
+import sys
+import re
+import fnmatch
+import heapq
+import mmap
+import struct
+import zlib
+import hashlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Optional - only used to speed up reading the on-disk history
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Application version
+APP_VERSION = "2.6"
+
+
+def launch_detached(command: List[str], engine_loop: "EngineLoop") -> subprocess.Popen:
+    """Start an application in its own console (Windows) or session (elsewhere)"""
+    if sys.platform == "win32":
+        return subprocess.Popen(command, creationflags=subprocess.CREATE_NEW_CONSOLE)
+    proc = subprocess.Popen(command, start_new_session=True,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Reap it when it exits, otherwise a crashed app lingers as a zombie that still looks alive
+    engine_loop.reap(proc)
+    return proc
+
+
+def terminate_processes(procs: List[psutil.Process], timeout: float, kill_timeout: float = 2.0) -> Dict[int, str]:
+    """Terminate processes, wait up to timeout for them to exit, then kill the rest
+
+    Returns an outcome per PID: "exited (code N)", "killed", "already gone" or
+    "still running" (could not be killed, e.g. access denied).
+    """
+    outcomes = {}
+    waiting = []
+    for proc in procs:
+        try:
+            proc.terminate()
+            waiting.append(proc)
+        except psutil.NoSuchProcess:
+            outcomes[proc.pid] = "already gone"
+        except psutil.AccessDenied:
+            outcomes[proc.pid] = "still running"
+
+    # wait_procs returns as soon as every process has exited, so fast exits don't wait out the timeout
+    gone, alive = psutil.wait_procs(waiting, timeout=timeout)
+    for proc in gone:
+        outcomes[proc.pid] = f"exited (code {proc.returncode})"
+
+    killing = []
+    for proc in alive:
+        try:
+            proc.kill()
+            killing.append(proc)
+        except psutil.NoSuchProcess:
+            outcomes[proc.pid] = "exited"
+        except psutil.AccessDenied:
+            outcomes[proc.pid] = "still running"
+
+    gone, alive = psutil.wait_procs(killing, timeout=kill_timeout)
+    for proc in gone:
+        outcomes[proc.pid] = "killed"
+    for proc in alive:
+        outcomes[proc.pid] = "still running"
+    return outcomes
+
+
+# Fields of a monitored_apps.json entry; the optional ones are only saved when set
+APP_FIELDS = ("name", "process_name", "status", "enabled", "last_cpu", "restart_count", "executable_path",
+              "threshold_exceeded_time", "match_type", "match_pattern", "include_children", "policy", "restart_governor")
+OPTIONAL_APP_FIELDS = ("match_type", "match_pattern", "include_children", "policy", "restart_governor")
+
+
+class AppState:
+    """One monitored app as a fixed-slot record
+
+    Reads work like the dicts in monitored_apps.json (app["status"],
+    app.get("policy")). A record that is part of a published snapshot is
+    never modified - AppStore.edit() hands out a copy and publishes that.
+    Copies share the policy and restart_governor dicts, which are replaced
+    rather than changed in place.
+    """
+
+    __slots__ = APP_FIELDS + ("extra",)
+
+    def __init__(self, name: str, process_name: Optional[str] = None, status: str = "Active", enabled: bool = True,
+                 last_cpu: float = 0.0, restart_count: int = 0, executable_path: Optional[str] = None,
+                 threshold_exceeded_time: Optional[float] = None, match_type: Optional[str] = None,
+                 match_pattern: Optional[str] = None, include_children: Optional[bool] = None,
+                 policy: Optional[Dict] = None, restart_governor: Optional[Dict] = None,
+                 extra: Optional[Dict] = None) -> None:
+        self.name = name
+        self.process_name = process_name if process_name is not None else name.lower()
+        self.status = status
+        self.enabled = enabled
+        self.last_cpu = last_cpu
+        self.restart_count = restart_count
+        self.executable_path = executable_path
+        self.threshold_exceeded_time = threshold_exceeded_time
+        self.match_type = match_type
+        self.match_pattern = match_pattern
+        self.include_children = include_children
+        self.policy = policy
+        self.restart_governor = restart_governor if isinstance(restart_governor, dict) else {}
+        self.extra = extra or {}  # Unknown keys, kept so they survive a save
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AppState":
+        known = {key: value for key, value in data.items() if key in APP_FIELDS}
+        extra = {key: value for key, value in data.items() if key not in APP_FIELDS}
+        return cls(extra=extra, **known)
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for field in APP_FIELDS:
+            value = getattr(self, field)
+            if field not in OPTIONAL_APP_FIELDS or (value is not None and value != {}):
+                data[field] = value
+        data.update(self.extra)
+        return data
+
+    def copy(self) -> "AppState":
+        clone = AppState.__new__(AppState)
+        for field in AppState.__slots__:
+            setattr(clone, field, getattr(self, field))
+        clone.extra = dict(self.extra)
+        return clone
+
+    def __getitem__(self, key: str):
+        if key in APP_FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key) if key in APP_FIELDS else self.extra.get(key)
+        return default if value is None else value
+
+
+class AppStore:
+    """The monitored apps, with copy-on-write snapshots
+
+    snapshot() returns an immutable tuple of records, so the sampler and the
+    UI iterate a consistent view without taking any lock. Writers serialize
+    on one lock, change copies of the records and publish a new snapshot.
+    """
+
+    def __init__(self, apps: Optional[List[AppState]] = None) -> None:
+        self.lock = threading.RLock()
+        self._publish(tuple(apps or ()))
+
+    def _publish(self, apps: Tuple[AppState, ...], positions: Optional[Dict[str, int]] = None) -> None:
+        if positions is None:
+            positions = {app.name: index for index, app in enumerate(apps)}
+        # One attribute swap, so readers see either the old or the new snapshot
+        self._state = (apps, positions)
+
+    def snapshot(self) -> Tuple[AppState, ...]:
+        return self._state[0]
+
+    def get(self, name: str) -> Optional[AppState]:
+        apps, positions = self._state
+        index = positions.get(name)
+        return apps[index] if index is not None else None
+
+    def replace(self, apps: List[AppState]) -> None:
+        with self.lock:
+            self._publish(tuple(apps))
+
+    def add(self, app: AppState) -> bool:
+        """Append an app; False if one with the same name already exists"""
+        with self.lock:
+            if self.get(app.name) is not None:
+                return False
+            self._publish(self.snapshot() + (app,))
+            return True
+
+    def remove(self, name: str) -> Optional[AppState]:
+        with self.lock:
+            app = self.get(name)
+            if app is not None:
+                self._publish(tuple(other for other in self.snapshot() if other is not app))
+            return app
+
+    @contextmanager
+    def edit(self, name: str):
+        """Yield a copy of an app's record to change, published when the block exits
+
+        Yields None if the app has been removed. Blocks run under the write
+        lock, so keep them short and free of I/O.
+        """
+        with self.lock:
+            current = self.get(name)
+            if current is None:
+                yield None
+                return
+            app = current.copy()
+            yield app
+            self._replace({name: app})
+
+    def update(self, name: str, **changes) -> Optional[AppState]:
+        """Set fields of an app's record; returns the new record, or None if the app is gone"""
+        with self.edit(name) as app:
+            if app is not None:
+                for field, value in changes.items():
+                    setattr(app, field, value)
+            return app
+
+    def update_many(self, changes: Dict[str, Dict]) -> None:
+        """Apply {app name: {field: value}} for many apps as one new snapshot"""
+        with self.lock:
+            replacements = {}
+            for name, fields in changes.items():
+                current = self.get(name)
+                if current is None:
+                    continue
+                app = replacements[name] = current.copy()
+                for field, value in fields.items():
+                    setattr(app, field, value)
+            self._replace(replacements)
+
+    def _replace(self, replacements: Dict[str, AppState]) -> None:
+        apps, positions = self._state
+        # Names and order are unchanged, so the position map carries over
+        apps = list(apps)
+        for name, app in replacements.items():
+            apps[positions[name]] = app
+        self._publish(tuple(apps), positions)
+
+
+# Rule types accepted in the "match_type" field of monitored_apps.json
+MATCH_TYPES = ("substring", "exact", "prefix", "glob", "regex")
+
+
+class AppMatcher:
+    """Compiled process-matching rules for every enabled monitored app
+
+    Each app matches on its "match_pattern" (defaults to the app name) using its
+    "match_type" (defaults to "substring", which also checks the exe path).
+    Exact rules are a dict lookup; everything else is folded into one combined
+    regex per field that rejects non-matching processes in a single search, so
+    only the rare candidate process is checked rule by rule.
+    """
+
+    def __init__(self, apps: List[Dict]) -> None:
+        self.errors: List[str] = []
+        self._exact: Dict[str, List[str]] = {}
+        # (app name, compiled rule, also checked against the exe path)
+        self._rules: List[Tuple[str, "re.Pattern", bool]] = []
+        name_sources = []
+        exe_sources = []
+
+        for app in apps:
+            match_type = app.get("match_type", "substring")
+            pattern = app.get("match_pattern") or app["name"]
+
+            if match_type not in MATCH_TYPES:
+                self.errors.append(f"{app['name']}: unknown match_type '{match_type}'")
+                continue
+
+            if match_type == "exact":
+                self._exact.setdefault(pattern.lower(), []).append(app["name"])
+                continue
+
+            if match_type == "substring":
+                source = re.escape(pattern)
+            elif match_type == "prefix":
+                source = "^" + re.escape(pattern)
+            elif match_type == "glob":
+                source = "^" + fnmatch.translate(pattern)
+            else:
+                source = pattern
+
+            try:
+                rule = re.compile(source, re.IGNORECASE)
+            except re.error as e:
+                self.errors.append(f"{app['name']}: invalid {match_type} pattern '{pattern}': {e}")
+                continue
+
+            check_exe = match_type == "substring"
+            self._rules.append((app["name"], rule, check_exe))
+            name_sources.append(f"(?:{source})")
+            if check_exe:
+                exe_sources.append(f"(?:{source})")
+
+        self._name_filter = self._combine(name_sources)
+        self._exe_filter = self._combine(exe_sources)
+
+    @staticmethod
+    def _combine(sources: List[str]) -> Optional["re.Pattern"]:
+        if not sources:
+            return None
+        try:
+            return re.compile("|".join(sources), re.IGNORECASE)
+        except re.error:
+            # User regexes that cannot be combined (e.g. inline flags) fall back to a match-everything filter
+            return re.compile("")
+
+    def match(self, name_lower: str, exe_lower: str) -> Tuple[str, ...]:
+        """Return the names of every app whose rule matches this process"""
+        matched = list(self._exact.get(name_lower, ()))
+
+        name_hit = self._name_filter is not None and self._name_filter.search(name_lower)
+        exe_hit = bool(exe_lower) and self._exe_filter is not None and self._exe_filter.search(exe_lower)
+        if name_hit or exe_hit:
+            for app_name, rule, check_exe in self._rules:
+                if app_name in matched:
+                    continue
+                if rule.search(name_lower) or (check_exe and exe_lower and rule.search(exe_lower)):
+                    matched.append(app_name)
+
+        return tuple(matched)
+
+
+class ProcessRecord:
+    """Cached identity of one live process"""
+
+    __slots__ = ("pid", "name", "exe", "create_time", "ppid", "name_lower", "exe_lower", "apps")
+
+    def __init__(self, pid: int, name: str, exe: str, create_time: float, ppid: int = 0) -> None:
+        self.pid = pid
+        self.name = name
+        self.exe = exe
+        self.create_time = create_time
+        # Parent at discovery time; re-pointed at the grandparent when the parent exits
+        self.ppid = ppid
+        self.name_lower = name.lower()
+        self.exe_lower = exe.lower()
+        self.apps: Tuple[str, ...] = ()
+
+    def process(self) -> Optional[psutil.Process]:
+        """Open a psutil handle for this process, or None if the PID now belongs to something else"""
+        try:
+            proc = psutil.Process(self.pid)
+            if abs(proc.create_time() - self.create_time) > 1.0:
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+
+class ResourceSample:
+    """CPU and resource usage of one process, or summed over an app's processes
+
+    Memory is in bytes, I/O rates in bytes per second. uss is None unless USS
+    sampling is enabled, and any metric the OS refuses to report stays 0.
+    baseline is False when cpu has no previous reading to be measured against
+    (a process sampled for the first time), or for a sum, when none of its
+    processes had one.
+    """
+
+    __slots__ = ("cpu", "baseline", "rss", "uss", "fds", "threads", "read_rate", "write_rate")
+
+    def __init__(self, cpu: float = 0.0, baseline: bool = False) -> None:
+        self.cpu = cpu
+        self.baseline = baseline
+        self.rss = 0
+        self.uss = None
+        self.fds = 0
+        self.threads = 0
+        self.read_rate = 0.0
+        self.write_rate = 0.0
+
+    def add(self, other: "ResourceSample") -> None:
+        self.cpu += other.cpu
+        self.baseline = self.baseline or other.baseline
+        self.rss += other.rss
+        if other.uss is not None:
+            self.uss = (self.uss or 0) + other.uss
+        self.fds += other.fds
+        self.threads += other.threads
+        self.read_rate += other.read_rate
+        self.write_rate += other.write_rate
+
+
+class IoRates:
+    """Per-PID read/write byte rates from cumulative I/O counters"""
+
+    def __init__(self) -> None:
+        # pid -> (read bytes, write bytes, timestamp) at the previous sample
+        self._last: Dict[int, Tuple[int, int, float]] = {}
+
+    def update(self, sample: ResourceSample, pid: int, read_bytes: int, write_bytes: int, now: float) -> None:
+        last = self._last.get(pid)
+        self._last[pid] = (read_bytes, write_bytes, now)
+        if last is not None and now > last[2]:
+            sample.read_rate = max(0, read_bytes - last[0]) / (now - last[2])
+            sample.write_rate = max(0, write_bytes - last[1]) / (now - last[2])
+
+    def forget(self, pid: int) -> None:
+        self._last.pop(pid, None)
+
+
+class PsutilCollector:
+    """Process discovery and non-blocking CPU sampling through psutil
+
+    psutil computes cpu_percent(interval=None) from the CPU times recorded by
+    the previous call on the same Process object, so holding on to the handles
+    gives per-tick deltas without sleeping. A process seen for the first time
+    reports 0.0 until the next tick.
+    """
+
+    name = "psutil"
+
+    def __init__(self) -> None:
+        self._handles: Dict[int, psutil.Process] = {}
+        self._sampled: set = set()  # PIDs whose handle has a CPU baseline
+        self._io = IoRates()
+
+    def pids(self) -> set:
+        return set(psutil.pids())
+
+    def describe(self, pid: int) -> Optional[Tuple[str, str, float, int]]:
+        """Return (name, exe, create_time, ppid) for a newly seen process"""
+        try:
+            proc = psutil.Process(pid)
+            info = proc.as_dict(attrs=["name", "exe", "create_time", "ppid"])
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+        # Keep an existing handle (and its CPU baseline) when a young process is described again
+        self._handles.setdefault(pid, proc)
+        return info.get("name") or "", info.get("exe") or "", info.get("create_time") or 0.0, info.get("ppid") or 0
+
+    def is_running(self, pid: int, create_time: float) -> bool:
+        handle = self._handles.get(pid)
+        # Process.is_running() also compares the create time, so a reused PID reports False
+        return handle is not None and handle.is_running()
+
+    def sample(self, pids: List[int], detail: bool = False, uss: bool = False) -> Dict[int, ResourceSample]:
+        """Return CPU% since the previous sample (plus memory, handles, threads and I/O with detail) per PID"""
+        now = time.monotonic()
+        samples = {}
+        for pid in pids:
+            # A process matched by several apps is only sampled once per tick
+            if pid in samples:
+                continue
+
+            handle = self._handles.get(pid)
+            if handle is None:
+                continue
+
+            try:
+                # oneshot() lets psutil fetch the values that share a system call only once
+                with handle.oneshot():
+                    sample = ResourceSample(handle.cpu_percent(interval=None), pid in self._sampled)
+                    if detail:
+                        self._sample_detail(handle, sample, uss, now)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._sampled.add(pid)
+            samples[pid] = sample
+
+        return samples
+
+    def _sample_detail(self, handle: psutil.Process, sample: ResourceSample, uss: bool, now: float) -> None:
+        # Each metric has its own permission rules, so one refusal doesn't hide the others
+        try:
+            sample.rss = handle.memory_info().rss
+            sample.threads = handle.num_threads()
+        except psutil.AccessDenied:
+            pass
+        try:
+            sample.fds = handle.num_handles() if sys.platform == "win32" else handle.num_fds()
+        except psutil.AccessDenied:
+            pass
+        try:
+            # io_counters() is not available on macOS
+            io = handle.io_counters()
+            self._io.update(sample, handle.pid, io.read_bytes, io.write_bytes, now)
+        except (psutil.AccessDenied, AttributeError):
+            pass
+        if uss:
+            try:
+                sample.uss = handle.memory_full_info().uss
+            except (psutil.AccessDenied, AttributeError):
+                pass
+
+    def forget(self, pid: int) -> None:
+        self._handles.pop(pid, None)
+        self._sampled.discard(pid)
+        self._io.forget(pid)
+
+
+class ProcfsCollector:
+    """Linux fast path that reads /proc directly instead of creating psutil objects
+
+    Only /proc/[pid]/stat (plus comm and the exe link when a PID is first
+    seen) and the first line of /proc/stat are read, into one reused buffer.
+    CPU% is the jiffy delta of utime+stime over the per-CPU jiffies elapsed
+    since that PID's previous sample, which matches psutil's cpu_percent().
+    """
+
+    name = "procfs"
+
+    def __init__(self, proc_root: str = "/proc") -> None:
+        self.proc_root = proc_root
+        self._buf = bytearray(4096)
+        self._cpu_count = os.cpu_count() or 1
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._boot_time = self._read_boot_time()
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        # pid -> (process jiffies, total jiffies per CPU) at the previous sample
+        self._last: Dict[int, Tuple[int, float]] = {}
+        self._io = IoRates()
+
+    @staticmethod
+    def available(proc_root: str = "/proc") -> bool:
+        return sys.platform.startswith("linux") and os.path.exists(os.path.join(proc_root, "stat"))
+
+    def _read(self, path: str) -> int:
+        """Read a small /proc file into the shared buffer and return its length"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return os.readv(fd, [self._buf])
+        finally:
+            os.close(fd)
+
+    def _read_boot_time(self) -> float:
+        with open(os.path.join(self.proc_root, "stat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"btime"):
+                    return float(line.split()[1])
+        return 0.0
+
+    def _total_jiffies(self) -> float:
+        """Jiffies elapsed per CPU, from the aggregate line of /proc/stat"""
+        n = self._read(f"{self.proc_root}/stat")
+        end = self._buf.find(b"\n", 0, n)
+        # user, nice, system, idle, iowait, irq, softirq, steal (guest time is already in user/nice)
+        return sum(int(field) for field in self._buf[:end].split()[1:9]) / self._cpu_count
+
+    def _stat_fields(self, pid: int) -> List[bytes]:
+        """Fields of /proc/[pid]/stat after the "(comm)" entry, i.e. starting at field 3 (state)"""
+        n = self._read(f"{self.proc_root}/{pid}/stat")
+        # comm may itself contain spaces or parentheses, so split after the last ")"
+        return self._buf[self._buf.rfind(b")", 0, n) + 2:n].split()
+
+    def pids(self) -> set:
+        return {int(entry.name) for entry in os.scandir(self.proc_root) if entry.name.isdigit()}
+
+    def describe(self, pid: int) -> Optional[Tuple[str, str, float, int]]:
+        """Return (name, exe, create_time, ppid) for a newly seen process"""
+        try:
+            fields = self._stat_fields(pid)
+            n = self._read(f"{self.proc_root}/{pid}/comm")
+            name = self._buf[:n].decode("utf-8", "replace").rstrip("\n")
+        except OSError:
+            return None
+
+        exe = ""
+        try:
+            exe = os.readlink(f"{self.proc_root}/{pid}/exe")
+        except OSError:
+            pass
+
+        # comm is truncated to 15 characters; recover the full name the way psutil does
+        if len(name) >= 15:
+            try:
+                with open(f"{self.proc_root}/{pid}/cmdline", "rb") as f:
+                    argv0 = os.path.basename(f.read().split(b"\0", 1)[0].decode("utf-8", "replace"))
+                if argv0.startswith(name):
+                    name = argv0
+            except OSError:
+                pass
+
+        # ppid is field 4
+        return name, exe, self._boot_time + int(fields[19]) / self._clock_ticks, int(fields[1])
+
+    def is_running(self, pid: int, create_time: float) -> bool:
+        try:
+            fields = self._stat_fields(pid)
+        except OSError:
+            return False
+        return abs(self._boot_time + int(fields[19]) / self._clock_ticks - create_time) <= 1.0
+
+    def sample(self, pids: List[int], detail: bool = False, uss: bool = False) -> Dict[int, ResourceSample]:
+        """Return CPU% since the previous sample (plus memory, handles, threads and I/O with detail) per PID"""
+        total = self._total_jiffies()
+        now = time.monotonic()
+        samples = {}
+        for pid in pids:
+            if pid in samples:
+                continue
+
+            try:
+                fields = self._stat_fields(pid)
+            except OSError:
+                continue
+
+            # utime + stime (fields 14 and 15)
+            jiffies = int(fields[11]) + int(fields[12])
+            last = self._last.get(pid)
+            self._last[pid] = (jiffies, total)
+            if last is None or total <= last[1]:
+                sample = ResourceSample()
+            else:
+                sample = ResourceSample((jiffies - last[0]) / (total - last[1]) * 100.0, True)
+
+            if detail:
+                # num_threads and rss (fields 20 and 24) come from the stat line already read
+                sample.threads = int(fields[17])
+                sample.rss = int(fields[21]) * self._page_size
+                self._sample_detail(pid, sample, uss, now)
+            samples[pid] = sample
+
+        return samples
+
+    def _sample_detail(self, pid: int, sample: ResourceSample, uss: bool, now: float) -> None:
+        try:
+            sample.fds = sum(1 for _ in os.scandir(f"{self.proc_root}/{pid}/fd"))
+        except OSError:
+            pass
+
+        # /proc/[pid]/io is only readable for our own processes unless we're privileged
+        try:
+            n = self._read(f"{self.proc_root}/{pid}/io")
+            counters = dict(line.split(b": ") for line in bytes(self._buf[:n]).splitlines() if b": " in line)
+            self._io.update(sample, pid, int(counters[b"read_bytes"]), int(counters[b"write_bytes"]), now)
+        except (OSError, KeyError, ValueError):
+            pass
+
+        if uss:
+            try:
+                n = self._read(f"{self.proc_root}/{pid}/smaps_rollup")
+                private_kb = sum(int(line.split()[1]) for line in self._buf[:n].splitlines()
+                                 if line.startswith((b"Private_Clean:", b"Private_Dirty:")))
+                sample.uss = private_kb * 1024
+            except (OSError, ValueError, IndexError):
+                pass
+
+    def forget(self, pid: int) -> None:
+        self._last.pop(pid, None)
+        self._io.forget(pid)
+
+
+# Collector backends selectable with "process_collector" in settings.json
+PROCESS_COLLECTORS = {"psutil": PsutilCollector, "procfs": ProcfsCollector}
+
+
+def create_collector(name: str):
+    """Build the configured collector, falling back to psutil where /proc is not available"""
+    collector_class = PROCESS_COLLECTORS.get(name, PsutilCollector)
+    if collector_class is ProcfsCollector and not ProcfsCollector.available():
+        logging.warning("procfs collector is not available on this platform - using psutil")
+        collector_class = PsutilCollector
+    return collector_class()
+
+
+class ProcessIndex:
+    """Persistent PID -> monitored app index with incremental process discovery
+
+    Each refresh only lists PIDs, describes and classifies the ones not seen
+    before and evicts the ones that are gone. Name, exe and create time are
+    looked up once per process lifetime instead of once per tick.
+    Processes younger than EXEC_GRACE seconds are described again on every
+    refresh, since one caught between fork and exec still shows its parent's
+    name.
+    """
+
+    EXEC_GRACE = 2.0
+
+    def __init__(self, collector) -> None:
+        self.collector = collector
+        self.records: Dict[int, ProcessRecord] = {}
+        self._young: Dict[int, Tuple[str, str]] = {}  # pid -> (name, exe) while within EXEC_GRACE
+        # ppid -> child PIDs, kept up to date as processes are discovered and evicted
+        self._children: Dict[int, set] = {}
+        self._matcher = AppMatcher([])
+        self._by_app: Dict[str, set] = {}
+        self._rules_changed = False
+        # Refreshed from the monitor thread and read from the UI thread
+        self._lock = threading.RLock()
+
+    def set_matcher(self, matcher: AppMatcher) -> None:
+        """Replace the app rules; every cached process is reclassified on the next refresh"""
+        with self._lock:
+            self._matcher = matcher
+            self._rules_changed = True
+
+    def refresh(self) -> None:
+        with self._lock:
+            live_pids = self.collector.pids()
+
+            for pid in [pid for pid in self.records if pid not in live_pids]:
+                self._evict(pid)
+
+            # A monitored PID may have been reused by a new process since the last tick
+            for pids in self._by_app.values():
+                for pid in list(pids):
+                    record = self.records.get(pid)
+                    if record is not None and not self.collector.is_running(pid, record.create_time):
+                        self._evict(pid)
+
+            if self._rules_changed:
+                self._rules_changed = False
+                self._by_app = {}
+                for record in self.records.values():
+                    self._classify(record)
+
+            for pid in live_pids:
+                if pid not in self.records:
+                    self._discover(pid)
+
+            now = time.time()
+            for pid, identity in list(self._young.items()):
+                record = self.records.get(pid)
+                if record is None:
+                    del self._young[pid]
+                    continue
+                # Refreshes can be further apart than EXEC_GRACE, so a process that has
+                # just aged out still gets this last look
+                description = self.collector.describe(pid)
+                if description is not None and description[:2] != identity:
+                    # It has exec'd since we first saw it - describe it from scratch
+                    self._evict(pid)
+                    self._discover(pid)
+                elif now - record.create_time > self.EXEC_GRACE:
+                    del self._young[pid]
+
+    def records_for(self, app_name: str, include_children: bool = False) -> List[ProcessRecord]:
+        """Processes matched by the app's rule, plus (with include_children) everything they started"""
+        with self._lock:
+            records = [self.records[pid] for pid in self._by_app.get(app_name, ())]
+            if not include_children:
+                return records
+
+            seen = {record.pid for record in records}
+            stack = list(records)
+            while stack:
+                parent = stack.pop()
+                for pid in self._children.get(parent.pid, ()):
+                    child = self.records.get(pid)
+                    # A child older than its "parent" points at a previous owner of a reused PID
+                    if child is None or child.pid in seen or child.create_time + 1.0 < parent.create_time:
+                        continue
+                    seen.add(child.pid)
+                    records.append(child)
+                    stack.append(child)
+            return records
+
+    def monitored_pids(self) -> set:
+        """PIDs that belong to at least one monitored app"""
+        with self._lock:
+            return {pid for pids in self._by_app.values() for pid in pids}
+
+    def apps_for_pid(self, pid: int) -> Tuple[str, ...]:
+        with self._lock:
+            record = self.records.get(pid)
+            return record.apps if record is not None else ()
+
+    def find(self, text: str, include_exe: bool = False) -> List[ProcessRecord]:
+        """Search the cached process names (and optionally exe paths) without touching the OS"""
+        needle = text.lower()
+        with self._lock:
+            return [record for record in self.records.values()
+                    if needle in record.name_lower or (include_exe and record.exe_lower and needle in record.exe_lower)]
+
+    def sample(self, records: List[ProcessRecord], detail: bool = False, uss: bool = False) -> Dict[int, ResourceSample]:
+        with self._lock:
+            return self.collector.sample([record.pid for record in records], detail, uss)
+
+    def _discover(self, pid: int) -> None:
+        description = self.collector.describe(pid)
+
+        # Skip processes with no name
+        if description is None or not description[0]:
+            self.collector.forget(pid)
+            return
+
+        record = ProcessRecord(pid, *description)
+        self.records[pid] = record
+        if time.time() - record.create_time <= self.EXEC_GRACE:
+            self._young[pid] = description[:2]
+        self._children.setdefault(record.ppid, set()).add(pid)
+        self._classify(record)
+
+    def _classify(self, record: ProcessRecord) -> None:
+        record.apps = self._matcher.match(record.name_lower, record.exe_lower)
+        for app_name in record.apps:
+            self._by_app.setdefault(app_name, set()).add(record.pid)
+
+    def _evict(self, pid: int) -> None:
+        record = self.records.pop(pid)
+        self._young.pop(pid, None)
+        self.collector.forget(pid)
+        for app_name in record.apps:
+            self._by_app.get(app_name, set()).discard(pid)
+
+        # Hand the orphans to the grandparent so they stay in the same app tree
+        siblings = self._children.get(record.ppid)
+        if siblings is not None:
+            siblings.discard(pid)
+            if not siblings:
+                del self._children[record.ppid]
+        orphans = self._children.pop(pid, set())
+        for child_pid in orphans:
+            self.records[child_pid].ppid = record.ppid
+        if orphans and record.ppid:
+            self._children.setdefault(record.ppid, set()).update(orphans)
+
+
+class EngineLoop:
+    """An asyncio event loop on its own thread that runs the engine's coroutines
+
+    Sampling ticks, restart sequences, exit watchers and notification sends are
+    all coroutines on this one loop, so delays and timers cost no threads and
+    are cancelled the moment monitoring stops. Blocking psutil, file and
+    network calls go to a small executor through run_blocking().
+    """
+
+    # How often a child is polled for reaping where pidfds are not available
+    REAP_POLL_INTERVAL = 1.0
+
+    def __init__(self, blocking_workers: int = 4) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, blocking_workers), thread_name_prefix="engine-io")
+        self.thread = threading.Thread(target=self._run, name="engine-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine from any thread; the returned future's cancel() cancels it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        """Run a plain callback on the loop thread"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def run_blocking(self, func: Callable, *args) -> "asyncio.Future":
+        """Await a blocking call on the executor"""
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    def reap(self, proc: subprocess.Popen) -> None:
+        """Collect a child's exit status once it exits, without a thread waiting on it (callable from any thread)"""
+        self.call_soon(self._reap, proc)
+
+    def _reap(self, proc: subprocess.Popen) -> None:
+        try:
+            # Readable once the child exits - also if it already has and is a zombie now
+            pidfd = os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            self._poll_child(proc)
+            return
+
+        def exited():
+            self.loop.remove_reader(pidfd)
+            os.close(pidfd)
+            proc.poll()
+
+        self.loop.add_reader(pidfd, exited)
+
+    def _poll_child(self, proc: subprocess.Popen) -> None:
+        if proc.poll() is None:
+            self.loop.call_later(self.REAP_POLL_INTERVAL, self._poll_child, proc)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Cancel every coroutine still running and stop the loop thread"""
+        if not self.thread.is_alive():
+            return
+
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            self.submit(cancel_all()).result(timeout)
+        except Exception as e:
+            logging.error(f"Engine loop did not wind down cleanly: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.executor.shutdown(wait=False)
+
+
+class RestartExecutor:
+    """Runs restart sequences as coroutines on the engine loop
+
+    At most max_concurrent restarts run at once; further ones wait on a
+    semaphore. Each app has at most one queued or running restart, so a slow
+    restart is never stacked up by later ticks.
+    """
+
+    def __init__(self, engine_loop: EngineLoop, max_concurrent: int = 2) -> None:
+        self.engine_loop = engine_loop
+        self.max_concurrent = max(1, max_concurrent)
+        self._slots = None  # Created on the loop thread (asyncio primitives bind to a loop on Python < 3.10)
+        self._jobs: Dict[str, Future] = {}
+        self._running: set = set()
+        self._lock = threading.Lock()
+
+    def submit(self, app_name: str, job: Callable, *args) -> bool:
+        """Queue a restart coroutine; returns False if one is already queued or running for this app"""
+        with self._lock:
+            if app_name in self._jobs:
+                return False
+            future = self.engine_loop.submit(self._run(app_name, job, *args))
+            self._jobs[app_name] = future
+
+        future.add_done_callback(lambda _: self._finished(app_name, future))
+        return True
+
+    async def _run(self, app_name: str, job: Callable, *args) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            with self._lock:
+                self._running.add(app_name)
+            try:
+                await job(*args)
+            finally:
+                with self._lock:
+                    self._running.discard(app_name)
+
+    def is_pending(self, app_name: str) -> bool:
+        with self._lock:
+            return app_name in self._jobs
+
+    def cancel_queued(self) -> None:
+        """Drop restarts that have not started yet; running ones are left to finish"""
+        with self._lock:
+            futures = [future for app_name, future in self._jobs.items() if app_name not in self._running]
+        for future in futures:
+            future.cancel()
+
+    def shutdown(self) -> None:
+        # Running restarts are cancelled along with everything else when the engine loop closes
+        self.cancel_queued()
+
+    def _finished(self, app_name: str, future: Future) -> None:
+        with self._lock:
+            if self._jobs.get(app_name) is future:
+                del self._jobs[app_name]
+
+
+class ExitWatcher:
+    """Notifies the monitor as soon as a watched process exits
+
+    On Linux every watched PID gets a pidfd that the engine loop watches for
+    readability, which it becomes when the process exits. Elsewhere (or on
+    kernels without pidfd_open) a coroutine polls psutil.wait_procs.
+    on_exit is called on the engine's executor with the PID that exited.
+    """
+
+    # How often the psutil fallback checks the watched processes
+    POLL_TIMEOUT = 0.5
+
+    def __init__(self, engine_loop: EngineLoop, on_exit: Callable[[int], None]) -> None:
+        self.engine_loop = engine_loop
+        self.on_exit = on_exit
+        self.use_pidfd = self._pidfd_supported()
+        self._watched: Dict[int, object] = {}  # pid -> pidfd or psutil.Process, only touched on the loop thread
+        self._poll_task = None
+
+    @staticmethod
+    def _pidfd_supported() -> bool:
+        if not hasattr(os, "pidfd_open"):
+            return False
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            return True
+        except OSError:
+            return False
+
+    def start(self) -> None:
+        self.engine_loop.call_soon(self._start)
+
+    def stop(self) -> None:
+        self.engine_loop.call_soon(self._stop)
+
+    def sync(self, pids: set) -> None:
+        """Watch exactly the given PIDs"""
+        self.engine_loop.call_soon(self._sync, set(pids))
+
+    def _start(self) -> None:
+        if not self.use_pidfd and (self._poll_task is None or self._poll_task.done()):
+            self._poll_task = self.engine_loop.loop.create_task(self._wait_procs_loop())
+
+    def _stop(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        self._sync(set())
+
+    def _sync(self, pids: set) -> None:
+        for pid in [pid for pid in self._watched if pid not in pids]:
+            self._release(self._watched.pop(pid))
+        for pid in pids:
+            if pid not in self._watched:
+                handle = self._open(pid)
+                if handle is not None:
+                    self._watched[pid] = handle
+                    if self.use_pidfd:
+                        self.engine_loop.loop.add_reader(handle, self._exited, pid, handle)
+
+    def _open(self, pid: int):
+        try:
+            return os.pidfd_open(pid) if self.use_pidfd else psutil.Process(pid)
+        except (OSError, psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    def _release(self, handle) -> None:
+        if self.use_pidfd:
+            self.engine_loop.loop.remove_reader(handle)
+            os.close(handle)
+
+    def _exited(self, pid: int, handle) -> None:
+        # The PID may have been unwatched (and its pidfd closed) while wait_procs was running
+        if self._watched.get(pid) != handle:
+            return
+        del self._watched[pid]
+        self._release(handle)
+        # on_exit refreshes the process index, so it runs on the executor rather than the loop
+        self.engine_loop.run_blocking(self._notify, pid)
+
+    def _notify(self, pid: int) -> None:
+        try:
+            self.on_exit(pid)
+        except Exception as e:
+            logging.error(f"Exit watcher callback failed for PID {pid}: {str(e)}")
+
+    async def _wait_procs_loop(self) -> None:
+        while True:
+            procs = list(self._watched.values())
+            if procs:
+                gone, _ = await self.engine_loop.run_blocking(psutil.wait_procs, procs, 0)
+                for proc in gone:
+                    self._exited(proc.pid, proc)
+            await asyncio.sleep(self.POLL_TIMEOUT)
+
+
+class SamplingScheduler:
+    """Adaptive per-app sampling intervals kept in a priority queue keyed by next-due time
+
+    An app in a threshold warning is sampled every fast_interval. An app
+    sitting well below the threshold backs off exponentially from
+    base_interval up to max_interval, and anything in between is sampled at
+    base_interval.
+    """
+
+    def __init__(self, base_interval: float, fast_interval: float, max_interval: float, backoff: float = 2.0) -> None:
+        self.base_interval = base_interval
+        self.fast_interval = min(fast_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.backoff = backoff
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        self.intervals: Dict[str, float] = {}
+
+    def sync(self, app_names: List[str], now: float) -> None:
+        """Schedule newly added apps immediately and forget removed ones"""
+        for app_name in app_names:
+            if app_name not in self._due:
+                self._push(app_name, now, self.base_interval)
+        wanted = set(app_names)
+        for app_name in [app_name for app_name in self._due if app_name not in wanted]:
+            # Stale heap entries are skipped when popped
+            del self._due[app_name]
+            del self.intervals[app_name]
+
+    def set_intervals(self, base_interval: float, fast_interval: float, max_interval: float, now: float) -> None:
+        """Switch to new intervals
+
+        Apps in a warning stay on the fast interval and every other app starts
+        over from base_interval; one due later than that is brought forward.
+        """
+        old_fast = self.fast_interval
+        intervals = (base_interval, min(fast_interval, base_interval), max(max_interval, base_interval))
+        if intervals == (self.base_interval, self.fast_interval, self.max_interval):
+            return
+        self.base_interval, self.fast_interval, self.max_interval = intervals
+
+        for app_name, due_time in list(self._due.items()):
+            interval = self.fast_interval if self.intervals[app_name] == old_fast else self.base_interval
+            self.intervals[app_name] = interval
+            if due_time > now + interval:
+                self._push(app_name, now + interval, interval)
+
+    def pop_due(self, now: float) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_time, app_name = heapq.heappop(self._heap)
+            if self._due.get(app_name) == due_time:
+                del self._due[app_name]
+                due.append(app_name)
+        return due
+
+    def reschedule(self, app_name: str, now: float, warning: bool, idle: bool) -> None:
+        if warning:
+            interval = self.fast_interval
+        elif idle:
+            interval = min(self.intervals.get(app_name, self.base_interval) * self.backoff, self.max_interval)
+        else:
+            interval = self.base_interval
+        self._push(app_name, now + interval, interval)
+
+    def seconds_until_next(self, now: float) -> float:
+        if not self._due:
+            return self.base_interval
+        return max(0.0, min(self._due.values()) - now)
+
+    def _push(self, app_name: str, due_time: float, interval: float) -> None:
+        self._due[app_name] = due_time
+        self.intervals[app_name] = interval
+        heapq.heappush(self._heap, (due_time, app_name))
+
+
+# App statuses stored as one byte per sample in the metrics history
+STATUS_CODES = ["Active", "Terminated", "Restarting", "Restarted", "Auto-Restarted", "Restart Failed", "Auto-Restart Failed",
+                "Backoff", "Circuit Open"]
+UNKNOWN_STATUS = 255
+
+
+class SeriesRing:
+    """Fixed-capacity ring of samples in typed arrays (about 17 bytes per sample)"""
+
+    __slots__ = ("capacity", "times", "cpu", "cpu_max", "counts", "status", "start", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.cpu = array("f", bytes(4 * capacity))
+        self.cpu_max = array("f", bytes(4 * capacity))
+        self.counts = array("H", bytes(2 * capacity))
+        self.status = array("B", bytes(capacity))
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: float, cpu: float, cpu_max: float, count: int, status: int) -> None:
+        if self.size < self.capacity:
+            slot = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            # Full: overwrite the oldest sample
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[slot] = timestamp
+        self.cpu[slot] = cpu
+        self.cpu_max[slot] = cpu_max
+        self.counts[slot] = min(count, 0xFFFF)
+        self.status[slot] = status
+
+    def oldest(self) -> Optional[float]:
+        return self.times[self.start] if self.size else None
+
+    def _bisect(self, timestamp: float) -> int:
+        """Position (in chronological order) of the first sample at or after timestamp"""
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            if self.times[(self.start + mid) % self.capacity] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def range(self, start: float, end: float) -> List[Tuple[float, float, float, int, int]]:
+        samples = []
+        for position in range(self._bisect(start), self.size):
+            slot = (self.start + position) % self.capacity
+            if self.times[slot] > end:
+                break
+            samples.append((self.times[slot], self.cpu[slot], self.cpu_max[slot], self.counts[slot], self.status[slot]))
+        return samples
+
+
+class MetricsTier:
+    """One resolution of an app's history; samples are averaged into buckets of bucket_seconds"""
+
+    __slots__ = ("bucket_seconds", "ring", "bucket_start", "cpu_sum", "cpu_max", "samples", "count_max", "status")
+
+    def __init__(self, bucket_seconds: int, capacity: int) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.ring = SeriesRing(capacity)
+        self.bucket_start = None
+        self.cpu_sum = 0.0
+        self.cpu_max = 0.0
+        self.samples = 0
+        self.count_max = 0
+        self.status = UNKNOWN_STATUS
+
+    def add(self, timestamp: float, cpu: float, count: int, status: int) -> None:
+        if not self.bucket_seconds:
+            self.ring.append(timestamp, cpu, cpu, count, status)
+            return
+
+        bucket_start = timestamp - timestamp % self.bucket_seconds
+        if self.bucket_start is not None and bucket_start != self.bucket_start:
+            self._flush()
+        if self.samples == 0:
+            self.bucket_start = bucket_start
+
+        self.cpu_sum += cpu
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.samples += 1
+        self.count_max = max(self.count_max, count)
+        self.status = status
+
+    def _pending(self) -> Optional[Tuple[float, float, float, int, int]]:
+        if not self.samples:
+            return None
+        return float(self.bucket_start), self.cpu_sum / self.samples, float(self.cpu_max), self.count_max, self.status
+
+    def _flush(self) -> None:
+        pending = self._pending()
+        if pending is not None:
+            self.ring.append(*pending)
+        self.cpu_sum = self.cpu_max = 0.0
+        self.samples = self.count_max = 0
+
+    def range(self, start: float, end: float) -> List[Tuple[float, float, float, int, int]]:
+        samples = self.ring.range(start, end)
+        # Include the bucket that is still being filled
+        pending = self._pending()
+        if pending is not None and start <= pending[0] <= end:
+            samples.append(pending)
+        return samples
+
+
+class MetricsStore:
+    """In-process, memory-bounded history of per-app CPU, process count and status
+
+    Every sample goes into three tiers: the last RAW_SAMPLES raw samples,
+    1-minute averages for a day and 1-hour averages for 30 days. Each tier is
+    a fixed-size ring, so memory per app stays constant however long the
+    monitor runs.
+    """
+
+    RAW_SAMPLES = 3600
+    # (tier name, bucket seconds, buckets kept)
+    TIERS = (("raw", 0, RAW_SAMPLES), ("1m", 60, 24 * 60), ("1h", 3600, 30 * 24))
+
+    def __init__(self) -> None:
+        self._apps: Dict[str, Dict[str, MetricsTier]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, app_name: str, timestamp: float, cpu: float, count: int, status: str) -> None:
+        status_code = STATUS_CODES.index(status) if status in STATUS_CODES else UNKNOWN_STATUS
+        with self._lock:
+            tiers = self._apps.get(app_name)
+            if tiers is None:
+                tiers = self._apps[app_name] = {name: MetricsTier(bucket, capacity) for name, bucket, capacity in self.TIERS}
+            for tier in tiers.values():
+                tier.add(timestamp, cpu, count, status_code)
+
+    def query(self, app_name: str, start: float, end: Optional[float] = None,
+              tier: Optional[str] = None) -> List[Tuple[float, float, float, int, str]]:
+        """Return (timestamp, mean CPU, max CPU, process count, status) samples between start and end
+
+        Without an explicit tier the finest one that still covers start is used,
+        or the one reaching back furthest when none does.
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            tiers = self._apps.get(app_name)
+            if tiers is None:
+                return []
+            if tier is None:
+                tier = self.TIERS[0][0]
+                for name, _, _ in self.TIERS:
+                    oldest = tiers[name].ring.oldest()
+                    if oldest is not None and oldest <= start:
+                        tier = name
+                        break
+                    # Young histories aren't covered by any tier; the raw one then holds everything
+                    if oldest is not None and oldest < tiers[tier].ring.oldest():
+                        tier = name
+            samples = tiers[tier].range(start, end)
+
+        return [(timestamp, cpu, cpu_max, count,
+                 STATUS_CODES[status] if status < len(STATUS_CODES) else "Unknown")
+                for timestamp, cpu, cpu_max, count, status in samples]
+
+    def forget(self, keep_apps: List[str]) -> None:
+        """Drop history for apps that are no longer monitored"""
+        with self._lock:
+            for app_name in [app_name for app_name in self._apps if app_name not in keep_apps]:
+                del self._apps[app_name]
+
+
+# Event codes stored with each history record
+HISTORY_EVENTS = ["sample", "restart", "auto-restart", "terminated", "restart-failed"]
+
+
+def history_key(app_name: str) -> int:
+    """32-bit key identifying an app in the history file"""
+    return zlib.crc32(app_name.encode("utf-8"))
+
+
+class HistoryLog:
+    """Append-only binary history of CPU samples and restart events, rotated by size
+
+    Every record is RECORD.size bytes: timestamp, app key, CPU %, process
+    count, status code and event code. Files are read back through mmap, as
+    NumPy views when NumPy is installed, so week-long queries need no text
+    parsing.
+    """
+
+    MAGIC = b"CPUHIST1"
+    RECORD = struct.Struct("<dIfHBB")
+    HEADER = struct.Struct("<8sH6x")
+    DTYPE = [("time", "<f8"), ("app", "<u4"), ("cpu", "<f4"), ("count", "<u2"), ("status", "u1"), ("event", "u1")]
+
+    def __init__(self, path: str = "cpu_history.bin", max_bytes: int = 16 * 1024 * 1024, backups: int = 4) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self, mode: str = "ab") -> None:
+        self._file = open(self.path, mode)
+        if self._file.tell() == 0:
+            self._file.write(self.HEADER.pack(self.MAGIC, self.RECORD.size))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        for index in range(self.backups, 0, -1):
+            source = f"{self.path}.{index - 1}" if index > 1 else self.path
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        # With no backups kept there is nothing to move aside, so start the file over
+        self._open("ab" if self.backups else "wb")
+
+    def append(self, records: List[Tuple[float, str, float, int, str, int]]) -> None:
+        """Write (timestamp, app name, cpu, process count, status, event code) records in one go"""
+        if not records:
+            return
+        data = b"".join(
+            self.RECORD.pack(timestamp, history_key(app_name), cpu, min(count, 0xFFFF),
+                             STATUS_CODES.index(status) if status in STATUS_CODES else UNKNOWN_STATUS, event)
+            for timestamp, app_name, cpu, count, status, event in records)
+        with self._lock:
+            if self._file is None:
+                self._open()
+            elif self._file.tell() + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+
+    def record_event(self, app_name: str, event: str, cpu: float, status: str) -> None:
+        self.append([(time.time(), app_name, cpu, 0, status, HISTORY_EVENTS.index(event))])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def files(self) -> List[str]:
+        """History files, oldest first"""
+        paths = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def _scan(self, path: str, app_name: Optional[str], start: float, end: float, reduce: Callable):
+        """Map one file and hand the matching records to reduce() while the mapping is open"""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # Ignore a record torn by a crash mid-write
+            count = (size - self.HEADER.size) // self.RECORD.size
+            if count <= 0:
+                return reduce(None)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, record_size = self.HEADER.unpack_from(mm)
+                if magic != self.MAGIC or record_size != self.RECORD.size:
+                    logging.error(f"Skipping unrecognised history file {path}")
+                    return reduce(None)
+
+                if numpy is not None:
+                    records = numpy.frombuffer(mm, dtype=self.DTYPE, count=count, offset=self.HEADER.size)
+                    mask = (records["time"] >= start) & (records["time"] <= end)
+                    if app_name is not None:
+                        mask &= records["app"] == history_key(app_name)
+                    try:
+                        return reduce(records[mask])
+                    finally:
+                        del records, mask
+
+                view = memoryview(mm)[self.HEADER.size:self.HEADER.size + count * self.RECORD.size]
+                try:
+                    key = history_key(app_name) if app_name is not None else None
+                    return reduce([record for record in self.RECORD.iter_unpack(view)
+                                   if start <= record[0] <= end and (key is None or record[1] == key)])
+                finally:
+                    view.release()
+
+    def query(self, app_name: Optional[str] = None, start: float = 0.0,
+              end: Optional[float] = None) -> List[Tuple[float, int, float, int, int, int]]:
+        """Return raw (timestamp, app key, cpu, count, status code, event code) records, oldest first"""
+        end = time.time() if end is None else end
+
+        def collect(found):
+            if found is None:
+                return []
+            return [tuple(record) for record in found.tolist()] if numpy is not None else found
+
+        records = []
+        for path in self.files():
+            records.extend(self._scan(path, app_name, start, end, collect))
+        return records
+
+    def max_cpu(self, app_name: str, start: float, end: Optional[float] = None) -> Optional[float]:
+        """Highest CPU sample recorded for app_name between start and end"""
+        end = time.time() if end is None else end
+
+        def peak(found):
+            if found is None or len(found) == 0:
+                return None
+            return float(found["cpu"].max()) if numpy is not None else max(record[2] for record in found)
+
+        peaks = [value for value in (self._scan(path, app_name, start, end, peak) for path in self.files())
+                 if value is not None]
+        return max(peaks) if peaks else None
+
+    def events(self, app_name: str, start: float, end: Optional[float] = None) -> List[Tuple[float, str, float]]:
+        """(timestamp, event, cpu) for every restart/termination event of app_name"""
+        return [(record[0], HISTORY_EVENTS[record[5]], record[2])
+                for record in self.query(app_name, start, end)
+                if 0 < record[5] < len(HISTORY_EVENTS)]
+
+
+class ThresholdWindow:
+    """Time-weighted rolling CPU statistics over the last cpu_threshold_duration seconds for one app
+
+    A CPU sample is the average since the previous one, so each sample is
+    weighted by the gap it covers - the scheduler spaces samples anywhere from
+    fast_check_interval to max_check_interval apart. Samples live in a ring
+    that grows to hold a whole duration, with running weighted sums and a
+    sparse 1%-wide weighted histogram, so adding a sample (and evicting old
+    ones) is amortised O(1) and p95 is a scan of the bins in use. The oldest
+    sample's gap may reach back past the window start; only the part inside
+    the window counts.
+    """
+
+    INITIAL_CAPACITY = 64
+    MIN_SAMPLES = 3
+
+    __slots__ = ("times", "cpu", "weights", "over", "start", "size", "weight_sum", "cpu_sum",
+                 "over_weight", "over_count", "histogram", "window_start", "last_time")
+
+    def __init__(self) -> None:
+        self.times = array("d", bytes(8 * self.INITIAL_CAPACITY))
+        self.cpu = array("f", bytes(4 * self.INITIAL_CAPACITY))
+        self.weights = array("d", bytes(8 * self.INITIAL_CAPACITY))
+        self.over = array("B", bytes(self.INITIAL_CAPACITY))
+        # 1% bin -> weight, only for the bins that hold samples
+        self.histogram: Dict[int, float] = {}
+        # Kept across resets - the next sample still covers the gap since the last one
+        self.last_time = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.start = 0
+        self.size = 0
+        self.weight_sum = 0.0
+        self.cpu_sum = 0.0
+        self.over_weight = 0.0
+        self.over_count = 0
+        self.window_start = 0.0
+        self.histogram.clear()
+
+    def _grow(self) -> None:
+        """Double the ring, unrolling it so the oldest sample is at index 0"""
+        order = [(self.start + index) % len(self.times) for index in range(self.size)]
+        for name in ("times", "cpu", "weights", "over"):
+            old = getattr(self, name)
+            new = array(old.typecode, [old[index] for index in order])
+            new.extend(array(old.typecode, bytes(old.itemsize * len(old))))
+            setattr(self, name, new)
+        self.start = 0
+
+    def _evict(self) -> None:
+        weight = self.weights[self.start]
+        self.weight_sum -= weight
+        self.cpu_sum -= weight * self.cpu[self.start]
+        self.over_weight -= weight * self.over[self.start]
+        self.over_count -= self.over[self.start]
+        cpu_bin = int(self.cpu[self.start])
+        remaining = self.histogram[cpu_bin] - weight
+        if remaining > 1e-9:
+            self.histogram[cpu_bin] = remaining
+        else:
+            del self.histogram[cpu_bin]
+        self.start = (self.start + 1) % len(self.times)
+        self.size -= 1
+
+    def _excess(self) -> float:
+        """How much of the oldest sample's gap lies before the window start"""
+        if not self.size:
+            return 0.0
+        return max(0.0, self.weights[self.start] - (self.times[self.start] - self.window_start))
+
+    def add(self, timestamp: float, cpu: float, threshold: float, duration: float) -> None:
+        # With no earlier sample the first one is taken to cover the whole window
+        weight = timestamp - self.last_time if self.last_time is not None else duration
+        self.last_time = timestamp
+        self.window_start = timestamp - duration
+
+        # Drop samples that fell out of the window; a full ring grows instead, so the
+        # window always spans the whole duration however short the sampling interval
+        while self.size and self.times[self.start] < self.window_start:
+            self._evict()
+        if self.size == len(self.times):
+            self._grow()
+
+        slot = (self.start + self.size) % len(self.times)
+        self.times[slot] = timestamp
+        self.cpu[slot] = cpu
+        self.weights[slot] = weight
+        self.over[slot] = cpu > threshold
+        self.size += 1
+        self.weight_sum += weight
+        self.cpu_sum += weight * cpu
+        self.over_weight += weight * (cpu > threshold)
+        self.over_count += cpu > threshold
+        cpu_bin = int(cpu)
+        self.histogram[cpu_bin] = self.histogram.get(cpu_bin, 0.0) + weight
+
+    def full(self, now: float, duration: float) -> bool:
+        """True once the retained samples cover the whole duration up to now"""
+        if self.size < self.MIN_SAMPLES:
+            return False
+        return self.times[self.start] - self.weights[self.start] <= now - duration
+
+    def _covered(self) -> float:
+        return self.weight_sum - self._excess()
+
+    def mean(self) -> float:
+        covered = self._covered()
+        if covered <= 0:
+            return 0.0
+        return (self.cpu_sum - self._excess() * self.cpu[self.start]) / covered
+
+    def fraction_over(self) -> float:
+        covered = self._covered()
+        if covered <= 0:
+            return 0.0
+        return (self.over_weight - self._excess() * self.over[self.start]) / covered
+
+    def p95(self) -> float:
+        oldest_bin = int(self.cpu[self.start]) if self.size else -1
+        excess = self._excess()
+        needed = 0.95 * self._covered()
+        seen = 0.0
+        for cpu_bin in sorted(self.histogram):
+            weight = self.histogram[cpu_bin]
+            if cpu_bin == oldest_bin:
+                weight -= excess
+            seen += weight
+            if weight > 0 and seen >= needed:
+                return float(cpu_bin)
+        return 0.0
+
+    def describe(self) -> str:
+        return f"mean {self.mean():.1f}%, p95 {self.p95():.0f}%, over {self.fraction_over():.0%} of the time ({self.size} samples)"
+
+
+# Global settings an app can override through the "policy" object in monitored_apps.json
+POLICY_FIELDS = ("cpu_threshold", "cpu_threshold_duration", "startup_delay", "auto_restart_enabled",
+                 "window_min_fraction_over", "window_mean_threshold", "window_p95_threshold",
+                 "rss_threshold_mb", "uss_threshold_mb", "fd_threshold", "thread_threshold",
+                 "io_threshold_mb_s", "resource_threshold_duration")
+
+
+class AppPolicy:
+    """An app's effective restart policy: its "policy" overrides on top of the global settings"""
+
+    __slots__ = POLICY_FIELDS
+
+    def __init__(self, defaults, overrides: Dict) -> None:
+        for field in POLICY_FIELDS:
+            setattr(self, field, overrides.get(field, getattr(defaults, field)))
+
+
+class RestartGovernor:
+    """Per-app restart storm protection: exponential backoff, a restart budget and a circuit breaker
+
+    State lives in each app's "restart_governor" dict so it is saved with
+    monitored_apps.json. Consecutive restarts are spaced backoff_base,
+    2 * backoff_base, ... up to backoff_max seconds apart. More than budget
+    restarts within budget_window seconds opens the circuit and stops
+    restarting; after breaker_cooldown seconds one trial restart is allowed
+    (half-open). An app that keeps running for stable_period seconds clears
+    the backoff and closes the circuit.
+
+    A published state dict is never changed: the methods that update it take
+    the record copy from AppStore.edit() and give it a new dict, so the update
+    is serialized by the store's lock and published with the record.
+    """
+
+    def __init__(self, backoff_base: float = 5.0, backoff_max: float = 300.0, budget: int = 5,
+                 budget_window: float = 600.0, stable_period: float = 300.0, breaker_cooldown: float = 3600.0) -> None:
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+        self.budget_window = budget_window
+        self.stable_period = stable_period
+        self.breaker_cooldown = breaker_cooldown
+
+    @staticmethod
+    def state_for(app) -> Dict:
+        """A private copy of the app's state, with defaults filled in"""
+        state = app.get("restart_governor")
+        state = dict(state) if isinstance(state, dict) else {}
+        state["restarts"] = list(state.get("restarts", ()))
+        state.setdefault("failures", 0)
+        state.setdefault("last_restart", None)
+        state.setdefault("circuit", "closed")
+        state.setdefault("opened_at", None)
+        state.setdefault("trial_done", False)
+        state.setdefault("running_since", None)
+        return state
+
+    def next_allowed(self, state: Dict) -> float:
+        if state["circuit"] == "open":
+            return state["opened_at"] + self.breaker_cooldown
+        if not state["failures"] or state["last_restart"] is None:
+            return 0.0
+        return state["last_restart"] + min(self.backoff_max, self.backoff_base * 2 ** (state["failures"] - 1))
+
+    def check(self, app, now: float) -> Tuple[bool, str]:
+        """Return (allowed, reason) for restarting app now (app being edited)"""
+        state = app.restart_governor = self.state_for(app)
+        if state["circuit"] == "half-open" and state["trial_done"]:
+            # The trial restart didn't stick - straight back to open
+            state.update(circuit="open", opened_at=now, trial_done=False)
+            return False, "trial restart failed - circuit open again"
+
+        if state["circuit"] == "open":
+            if now < self.next_allowed(state):
+                return False, f"circuit open after {self.budget} restarts in {self.budget_window:.0f}s"
+            # Cooldown over: let one trial restart through
+            state["circuit"] = "half-open"
+            return True, ""
+
+        state["restarts"] = [t for t in state["restarts"] if now - t < self.budget_window]
+        if len(state["restarts"]) >= self.budget:
+            state["circuit"] = "open"
+            state["opened_at"] = now
+            return False, f"circuit opened - {len(state['restarts'])} restarts in {self.budget_window:.0f}s"
+
+        wait = self.next_allowed(state) - now
+        if wait > 0:
+            return False, f"backing off for {wait:.1f}s after {state['failures']} restart(s)"
+        return True, ""
+
+    def record_restart(self, app, now: float) -> None:
+        state = app.restart_governor = self.state_for(app)
+        state["restarts"].append(now)
+        state["failures"] += 1
+        state["last_restart"] = now
+        state["running_since"] = None
+        if state["circuit"] == "half-open":
+            state["trial_done"] = True
+
+    @staticmethod
+    def engaged(app) -> bool:
+        """True while the app has a backoff or a non-closed circuit for running() to clear"""
+        state = app.get("restart_governor")
+        return isinstance(state, dict) and bool(state.get("failures") or state.get("circuit", "closed") != "closed")
+
+    def running(self, app, now: float) -> bool:
+        """Note that app (being edited) is running; returns True when that clears its backoff or circuit"""
+        if not self.engaged(app):
+            return False
+        state = self.state_for(app)
+        if state["running_since"] is None:
+            state["running_since"] = now
+            app.restart_governor = state
+            return False
+        if now - state["running_since"] < self.stable_period:
+            return False
+        app.restart_governor = {}
+        return True
+
+    def stopped(self, app) -> None:
+        """Note that app (being edited) is not running, which restarts its stable period"""
+        state = app.get("restart_governor")
+        if isinstance(state, dict) and state.get("running_since") is not None:
+            app.restart_governor = dict(state, running_since=None)
+
+    def reset(self, app) -> None:
+        app.restart_governor = {}
+
+
+def common_executable_paths(app_name: str) -> List[str]:
+    """Usual install locations of an app's executable on Windows"""
+    return [
+        f"C:\\Program Files\\{app_name}\\{app_name}.exe",
+        f"C:\\Program Files (x86)\\{app_name}\\{app_name}.exe",
+        f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Local\\{app_name}\\{app_name}.exe",
+        f"C:\\Users\\{os.getenv('USERNAME')}\\AppData\\Roaming\\{app_name}\\{app_name}.exe",
+        f"C:\\Program Files\\{app_name.capitalize()}\\{app_name.capitalize()}.exe",
+        f"C:\\Program Files (x86)\\{app_name.capitalize()}\\{app_name.capitalize()}.exe"
+    ]
+
+
+def stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime, inode, size) of a path, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ino, st.st_size
+
+
+class ExecutableCache:
+    """Executable lookups per app name, including misses, so restarts don't search again
+
+    A hit stays valid while the file's mtime/inode/size are unchanged and its
+    TTL hasn't expired. A miss remembers the signature of the directories that
+    were searched and expires sooner, or as soon as one of them changes (e.g.
+    the app gets installed).
+    """
+
+    def __init__(self, ttl: float = 3600.0, negative_ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # app name -> (path or None, signatures, expiry)
+        self._entries: Dict[str, Tuple[Optional[str], Tuple, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _search_dirs(app_name: str) -> List[str]:
+        return sorted({os.path.dirname(os.path.dirname(path)) for path in common_executable_paths(app_name)})
+
+    def get(self, app_name: str) -> Tuple[bool, Optional[str]]:
+        """Return (cached, path); path is None for a cached miss"""
+        with self._lock:
+            entry = self._entries.get(app_name)
+        if entry is None:
+            return False, None
+
+        path, signatures, expiry = entry
+        if time.time() >= expiry:
+            self.invalidate(app_name)
+            return False, None
+        if path is not None:
+            current = (stat_signature(path),)
+        else:
+            current = tuple(stat_signature(directory) for directory in self._search_dirs(app_name))
+        if current != signatures or (path is not None and current[0] is None):
+            self.invalidate(app_name)
+            return False, None
+        return True, path
+
+    def put(self, app_name: str, path: Optional[str]) -> None:
+        if path is not None:
+            entry = (path, (stat_signature(path),), time.time() + self.ttl)
+        else:
+            signatures = tuple(stat_signature(directory) for directory in self._search_dirs(app_name))
+            entry = (None, signatures, time.time() + self.negative_ttl)
+        with self._lock:
+            self._entries[app_name] = entry
+
+    def invalidate(self, app_name: Optional[str] = None) -> None:
+        """Forget one app's lookup, or every lookup"""
+        with self._lock:
+            if app_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(app_name, None)
+
+
+class SmtpSession:
+    """One SMTP connection reused across emails
+
+    Connects (STARTTLS, login) on first use, reconnects once when the server
+    has dropped the connection, and is closed after IDLE_TIMEOUT seconds
+    without mail.
+    """
+
+    IDLE_TIMEOUT = 300.0
+
+    def __init__(self) -> None:
+        self._server = None
+        self._params = None
+        self._last_used = 0.0
+
+    def _connect(self, params: Tuple) -> None:
+        import smtplib
+
+        host, port, username, password, use_tls = params
+        server = smtplib.SMTP(host, port, timeout=30)
+        try:
+            if use_tls:
+                server.starttls()
+            if password:
+                server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._params = params
+
+    def send(self, host: str, port: int, username: str, password: str, use_tls: bool,
+             from_addr: str, recipients: List[str], text: str) -> None:
+        import smtplib
+
+        params = (host, port, username, password, use_tls)
+        if self._server is not None and params != self._params:
+            self.close()
+
+        for attempt in range(2):
+            if self._server is None:
+                self._connect(params)
+            try:
+                self._server.sendmail(from_addr, recipients, text)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The server timed out our idle connection - reconnect once
+                self._server = None
+                if attempt:
+                    raise
+
+    def close_if_idle(self) -> None:
+        if self._server is not None and time.monotonic() - self._last_used >= self.IDLE_TIMEOUT:
+            self.close()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+
+class NotificationChannel:
+    """Delivers one kind of notification from its own queue, as a coroutine on the engine loop
+
+    Messages are held for digest_window seconds and folded into one digest,
+    and consecutive sends are at least min_interval seconds apart. Sends run
+    on the engine's executor.
+    """
+
+    # How often an empty channel calls idle()
+    IDLE_INTERVAL = 30.0
+
+    def __init__(self, engine_loop: EngineLoop, name: str, send: Callable[[str, str], None], min_interval: float = 0.0,
+                 digest_window: float = 0.0, idle: Optional[Callable[[], None]] = None) -> None:
+        self.engine_loop = engine_loop
+        self.name = name
+        self.send = send
+        self.min_interval = min_interval
+        self.digest_window = digest_window
+        self.idle = idle
+        self._queue = None  # Created on the loop thread (asyncio primitives bind to a loop on Python < 3.10)
+        self.worker = engine_loop.submit(self._run())
+
+    def _get_queue(self) -> "asyncio.Queue":
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def _run(self) -> None:
+        pending: List[Tuple[float, str, str]] = []
+        last_sent = float("-inf")
+        stopping = False
+
+        while True:
+            now = time.monotonic()
+            due_at = max(pending[0][0] + self.digest_window, last_sent + self.min_interval) if pending else None
+            if pending and (stopping or now >= due_at):
+                await self._deliver(pending)
+                pending = []
+                last_sent = time.monotonic()
+                continue
+            if stopping:
+                break
+
+            try:
+                item = await asyncio.wait_for(self._get_queue().get(), due_at - now if pending else self.IDLE_INTERVAL)
+            except asyncio.TimeoutError:
+                if not pending and self.idle is not None:
+                    await self.engine_loop.run_blocking(self.idle)
+                continue
+
+            if item is None:
+                stopping = True
+            else:
+                pending.append(item)
+
+        if self.idle is not None:
+            await self.engine_loop.run_blocking(self.idle)
+
+    async def _deliver(self, pending: List[Tuple[float, str, str]]) -> None:
+        if len(pending) == 1:
+            title, message = pending[0][1], pending[0][2]
+        else:
+            title = f"CPU Monitor - {len(pending)} notifications"
+            message = "\n".join(message for _, _, message in pending)
+        try:
+            await self.engine_loop.run_blocking(self.send, title, message)
+        except Exception as e:
+            logging.error(f"Error sending {self.name} notification: {str(e)}")
+
+    def post(self, title: str, message: str) -> None:
+        item = (time.monotonic(), title, message)
+        self.engine_loop.call_soon(lambda: self._get_queue().put_nowait(item))
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush what is pending and stop the worker"""
+        if self.worker.done():
+            return
+        self.engine_loop.call_soon(lambda: self._get_queue().put_nowait(None))
+        try:
+            self.worker.result(timeout)
+        except Exception as e:
+            logging.error(f"Error closing {self.name} notifications: {str(e)}")
+
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """Replace path with data so that a crash leaves either the old or the new contents, never a mix"""
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable; Windows can't open directories, and doesn't need this
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class JsonFile:
+    """Debounced, atomic persistence for one JSON file
+
+    save() only asks for a write: every save() within debounce seconds of the
+    first is folded into one write of whatever build() returns by then. A
+    write is skipped when the content hashes the same as what is on disk,
+    and goes through write_file_atomic otherwise.
+    """
+
+    def __init__(self, path: str, build: Callable[[], object], engine_loop: EngineLoop, debounce: float = 1.0) -> None:
+        self.path = path
+        self.build = build
+        self.engine_loop = engine_loop
+        self.debounce = debounce
+        self._pending = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._digest = self._file_digest()
+
+    def _file_digest(self) -> Optional[bytes]:
+        try:
+            with open(self.path, "rb") as f:
+                return hashlib.sha256(f.read()).digest()
+        except OSError:
+            return None
+
+    def save(self) -> None:
+        with self._lock:
+            if self._pending:
+                return
+            self._pending = True
+        self.engine_loop.call_soon(self._schedule)
+
+    def _schedule(self) -> None:
+        self.engine_loop.loop.call_later(self.debounce, self.engine_loop.run_blocking, self.flush)
+
+    def flush(self) -> bool:
+        """Carry out a queued save now (if the content changed); True if the file was written"""
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return False
+                self._pending = False
+            try:
+                data = json.dumps(self.build()).encode("utf-8")
+                digest = hashlib.sha256(data).digest()
+                if digest == self._digest:
+                    return False
+                write_file_atomic(self.path, data)
+                self._digest = digest
+                return True
+            except Exception as e:
+                logging.error(f"Error saving {self.path}: {str(e)}")
+                return False
+
+
+class MonitorEngine:
+    """Sampling, threshold and restart engine shared by the GUI and the headless daemon
+
+    Front ends override the hooks (log_message, apps_updated, status_updated,
+    notify_user) to surface what the engine is doing; the defaults print to
+    the console and write to cpu_monitor.log.
+    """
+
+    def __init__(self) -> None:
+        # Configure logging
+        logging.basicConfig(
+            filename="cpu_monitor.log",
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(message)s"
+        )
+
+        # App state
+        self.monitoring = False
+        self.paused = False
+        self.apps = AppStore()  # Read through monitored_apps, change through apps.edit()/update()
+        self.cpu_threshold = 50.0
+        self.check_interval = 5.0
+        self.fast_check_interval = 1.0  # Sampling interval while an app is in threshold warning
+        self.max_check_interval = 60.0  # Longest interval an idle app backs off to
+        self.startup_delay = 3.0
+        self.monitoring_startup_delay = 10.0  # New: delay before monitoring starts
+        self.auto_restart_enabled = True
+        self.cpu_threshold_duration = 30.0  # New: time in seconds CPU must be above threshold before restarting
+        # Restart predicates evaluated over the cpu_threshold_duration window (None disables one)
+        self.window_min_fraction_over = 0.8  # Share of samples above cpu_threshold
+        self.window_mean_threshold = None  # Window mean CPU must exceed this
+        self.window_p95_threshold = None  # Window p95 CPU must exceed this
+
+        # Restart storm protection (see RestartGovernor)
+        self.restart_backoff_base = 5.0
+        self.restart_backoff_max = 300.0
+        self.restart_budget = 5  # Restarts allowed per restart_budget_window before the circuit opens
+        self.restart_budget_window = 600.0
+        self.restart_stable_period = 300.0  # Uptime that resets backoff and closes the circuit
+        self.restart_breaker_cooldown = 3600.0  # Open circuit waits this long before one trial restart
+
+        # How long executable lookups (hits / misses) are cached
+        self.executable_cache_ttl = 3600.0
+        self.executable_negative_ttl = 300.0
+
+        # Seconds terminated processes get to exit before they are killed
+        self.terminate_timeout = 5.0
+
+        # Roll CPU and resources up over each app's child processes (per app: "include_children")
+        self.include_child_processes = True
+
+        # Memory, handle, thread and I/O metrics sampled alongside CPU (None disables a limit)
+        self.resource_metrics_enabled = True
+        self.uss_metrics_enabled = False  # USS reads the full memory map - noticeably slower
+        self.rss_threshold_mb = None
+        self.uss_threshold_mb = None
+        self.fd_threshold = None  # Open file descriptors (handles on Windows)
+        self.thread_threshold = None
+        self.io_threshold_mb_s = None  # Disk read + write rate
+        self.resource_threshold_duration = 60.0  # Seconds a limit must stay exceeded before restarting
+        
+        # Notification settings
+        self.windows_notifications_enabled = True
+        self.email_notifications_enabled = False
+        self.sms_notifications_enabled = False
+        self.email_smtp_server = "smtp.gmail.com"
+        self.email_smtp_port = 587
+        self.email_username = ""
+        self.email_password = ""
+        self.email_recipients = []
+        self.sms_api_key = ""
+        self.sms_phone_numbers = []
+        self.email_use_tls = True  # STARTTLS; turn off for a local test SMTP server
+        self.notification_digest_window = 30.0  # Email/SMS within this many seconds go out as one digest
+        self.email_min_interval = 60.0  # Minimum seconds between emails
+        self.sms_min_interval = 300.0  # Minimum seconds between SMS
+        
+        # Process collector backend ("psutil" or the Linux-only "procfs")
+        self.process_collector = "psutil"
+        self.max_concurrent_restarts = 2
+
+        # Activity log
+        self.console_log_enabled = True  # Echo log lines to the console
+        self.log_max_lines = 1000  # Lines kept in the GUI activity log
+
+        # Binary CPU/restart history (cpu_history.bin, rotated by size)
+        self.history_enabled = True
+        self.history_max_mb = 16
+        self.history_files = 4  # Rotated files kept besides the current one
+
+        # Load saved settings
+        self.load_settings()
+
+        self.process_index = ProcessIndex(create_collector(self.process_collector))
+        # Ticks, restarts, exit watchers and notifications all run on this loop
+        self.engine_loop = EngineLoop(self.max_concurrent_restarts + 4)
+        self.monitor_task = None
+        # settings.json / monitored_apps.json are written debounced and atomically
+        self.settings_file = JsonFile("settings.json", self.settings_dict, self.engine_loop)
+        self.apps_file = JsonFile("monitored_apps.json", lambda: [app.to_dict() for app in self.monitored_apps],
+                                  self.engine_loop)
+        self.wakeup = None  # asyncio.Event that cuts the monitor loop's current wait short
+        self.restart_executor = RestartExecutor(self.engine_loop, self.max_concurrent_restarts)
+        self.exit_watcher = ExitWatcher(self.engine_loop, self.on_process_exit)
+        self.metrics = MetricsStore()
+        self.smtp_session = SmtpSession()
+        self.sms_client = None
+        self.windows_dialogs = None  # Queue for the Windows dialog thread, started on first use
+        self.notification_channels = {
+            "windows": NotificationChannel(self.engine_loop, "windows", self.send_windows_notification),
+            "email": NotificationChannel(self.engine_loop, "email", self.send_email_notification, self.email_min_interval,
+                                         self.notification_digest_window, self.smtp_session.close_if_idle),
+            "sms": NotificationChannel(self.engine_loop, "sms", lambda title, message: self.send_sms_notification(message),
+                                       self.sms_min_interval, self.notification_digest_window),
+        }
+        self.threshold_windows: Dict[str, ThresholdWindow] = {}
+        self.app_policies: Dict[str, AppPolicy] = {}
+        self.restart_governor = self.create_restart_governor()
+        self.executable_cache = ExecutableCache(self.executable_cache_ttl, self.executable_negative_ttl)
+        # App name -> "Backoff"/"Circuit Open" while its restart is held back
+        self.restart_holds: Dict[str, str] = {}
+        self.app_resources: Dict[str, ResourceSample] = {}
+        self.resource_exceeded_since: Dict[str, float] = {}
+        self.history = HistoryLog(max_bytes=int(self.history_max_mb * 1024 * 1024), backups=self.history_files)
+
+    @property
+    def monitored_apps(self) -> Tuple[AppState, ...]:
+        """Consistent snapshot of the monitored apps; safe to iterate from any thread"""
+        return self.apps.snapshot()
+
+    # --- Front-end hooks ---
+
+    def log_message(self, message: str, level: int = logging.INFO) -> None:
+        if self.console_log_enabled:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"LOG: [{timestamp}] {message}")
+        logging.log(level, message)
+
+    def apps_updated(self) -> None:
+        """Called whenever app status, CPU or configuration changed"""
+
+    def status_updated(self) -> None:
+        """Called after every monitoring tick"""
+
+    def notify_user(self, title: str, message: str) -> None:
+        """Called after a successful restart"""
+
+    def monitoring_started(self) -> None:
+        """Called once the monitoring startup delay has passed and the first tick is due"""
+        self.log_message(f"Started CPU monitoring (collector: {self.process_index.collector.name})")
+
+    # --- Engine lifecycle ---
+
+    def start_engine(self, startup_delay: float = 0.0) -> None:
+        """Start the monitoring coroutine (after startup_delay seconds) and the exit watchers"""
+        self.monitoring = True
+        self.resolve_policies()
+        self.scheduler = SamplingScheduler(self.check_interval, self.fast_check_interval, self.max_check_interval)
+        self.monitor_task = self.engine_loop.submit(self.monitor_loop(startup_delay))
+
+    def stop_engine(self) -> None:
+        self.monitoring = False
+        self.paused = False
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            self.monitor_task = None
+        self.restart_executor.cancel_queued()
+        self.exit_watcher.stop()
+
+    def pause_engine(self) -> None:
+        self.paused = True
+        self.wake_engine()
+
+    def resume_engine(self) -> None:
+        self.paused = False
+        self.wake_engine()
+
+    def settings_changed(self) -> None:
+        """Apply changed intervals, thresholds and policies to the running engine right away"""
+        self.resolve_policies()
+        if self.monitoring:
+            # The scheduler is only touched on the loop thread
+            self.engine_loop.call_soon(self.apply_intervals)
+            self.wake_engine()
+
+    def apply_intervals(self) -> None:
+        self.scheduler.set_intervals(self.check_interval, self.fast_check_interval, self.max_check_interval, time.time())
+
+    def wake_engine(self) -> None:
+        """Have the monitor loop re-check pause state, settings and due apps now (callable from any thread)"""
+        if self.monitoring:
+            self.engine_loop.call_soon(lambda: self.get_wakeup().set())
+
+    def get_wakeup(self) -> "asyncio.Event":
+        # Created on the loop thread - asyncio primitives bind to a loop on Python < 3.10
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+        return self.wakeup
+
+    async def wait_for_wakeup(self, timeout: Optional[float]) -> None:
+        """Sleep up to timeout seconds (forever with None), returning early on wake_engine()"""
+        wakeup = self.get_wakeup()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+    def shutdown(self) -> None:
+        """Stop monitoring, flush notifications, history and queued saves, and close the engine loop"""
+        if self.monitoring:
+            self.stop_engine()
+        self.restart_executor.shutdown()
+        self.close_notifications()
+        self.history.close()
+        self.engine_loop.close()
+        self.settings_file.flush()
+        self.apps_file.flush()
+
+    def monitored_apps_changed(self):
+        """Recompile the enabled apps' match rules and have the process index reclassify cached PIDs"""
+        matcher = AppMatcher([app for app in self.monitored_apps if app.get("enabled", True)])
+        for error in matcher.errors:
+            self.log_message(f"WARNING: Ignoring match rule - {error}")
+        self.process_index.set_matcher(matcher)
+        self.resolve_policies()
+        self.metrics.forget([app["name"] for app in self.monitored_apps])
+        app_names = {app["name"] for app in self.monitored_apps}
+        for app_name in [app_name for app_name in self.threshold_windows if app_name not in app_names]:
+            del self.threshold_windows[app_name]
+        for app_name in [app_name for app_name in self.app_resources if app_name not in app_names]:
+            del self.app_resources[app_name]
+            self.resource_exceeded_since.pop(app_name, None)
+        # New or re-enabled apps get their first check now rather than after the current wait
+        self.wake_engine()
+
+    def resolve_policies(self):
+        """Merge each app's policy overrides with the global settings, once per configuration change"""
+        policies = {}
+        for app in self.monitored_apps:
+            overrides = app.get("policy") or {}
+            if not isinstance(overrides, dict):
+                self.log_message(f"WARNING: Ignoring policy for {app['name']} - expected an object")
+                overrides = {}
+            unknown = sorted(set(overrides) - set(POLICY_FIELDS))
+            if unknown:
+                self.log_message(f"WARNING: Ignoring unknown policy settings for {app['name']}: {', '.join(unknown)}")
+            policies[app["name"]] = AppPolicy(self, overrides)
+        # Swap the whole map at once so the monitor thread never sees a half-built one
+        self.app_policies = policies
+        self.restart_governor = self.create_restart_governor()
+
+    def create_restart_governor(self) -> RestartGovernor:
+        return RestartGovernor(self.restart_backoff_base, self.restart_backoff_max, self.restart_budget,
+                               self.restart_budget_window, self.restart_stable_period, self.restart_breaker_cooldown)
+
+    def policy_for(self, app) -> AppPolicy:
+        policy = self.app_policies.get(app["name"])
+        if policy is None:
+            policy = AppPolicy(self, app["policy"] if isinstance(app.get("policy"), dict) else {})
+        return policy
+
+    async def monitor_loop(self, startup_delay: float = 0.0):
+        if startup_delay > 0:
+            await asyncio.sleep(startup_delay)
+        self.exit_watcher.start()
+        self.monitoring_started()
+
+        while self.monitoring:
+            try:
+                if not self.paused:
+                    now = time.time()
+                    self.scheduler.sync([app["name"] for app in self.monitored_apps if app.get("enabled", True)], now)
+                    due_apps = self.scheduler.pop_due(now)
+                    if due_apps:
+                        # Sampling is blocking psutil/procfs work, so it runs on the executor
+                        await self.engine_loop.run_blocking(self.check_apps_cpu, due_apps)
+                        self.status_updated()
+                    # Pause, resume, settings and app changes cut the wait short
+                    await self.wait_for_wakeup(min(self.scheduler.seconds_until_next(time.time()), self.check_interval))
+                else:
+                    await self.wait_for_wakeup(None)
+            except Exception as e:
+                self.log_message(f"Error in monitoring loop: {str(e)}")
+                logging.error(f"Monitoring loop error: {str(e)}")
+                await self.wait_for_wakeup(self.check_interval)
+
+    def check_apps_cpu(self, app_names: Optional[List[str]] = None):
+        # Skip disabled apps, and apps that are not due yet when called from the scheduler
+        enabled_apps = [app for app in self.monitored_apps
+                        if app.get("enabled", True) and (app_names is None or app["name"] in app_names)]
+
+        # Refresh the process index once per tick and share the result between all apps
+        try:
+            usage = self.get_apps_cpu_usage([app["name"] for app in enabled_apps])
+        except Exception as e:
+            self.log_message(f"Error refreshing process index: {str(e)}")
+            logging.error(f"Error refreshing process index: {str(e)}")
+            return
+
+        # Get told about exits between ticks instead of waiting for the next one
+        self.exit_watcher.sync(self.process_index.monitored_pids())
+
+        # Every app's new reading goes out as one snapshot
+        self.apps.update_many({app["name"]: {"last_cpu": usage[app["name"]][0]} for app in enabled_apps})
+
+        for app in enabled_apps:
+            app_name = app["name"]
+            try:
+                app = self.apps.get(app_name)
+                if app is None:
+                    continue  # Removed while we were sampling
+                cpu_percent, process_count = usage[app_name]
+
+                # Leave apps alone while their restart is queued or running
+                if self.restart_executor.is_pending(app["name"]):
+                    continue
+
+                window = self.threshold_windows.get(app["name"])
+                if window is None:
+                    window = self.threshold_windows[app["name"]] = ThresholdWindow()
+                current_time = time.time()
+                policy = self.policy_for(app)
+
+                # Check if application is terminated and auto-restart is enabled
+                if process_count == 0 and policy.auto_restart_enabled:
+                    window.reset()
+                    app = self.apps.update(app_name, threshold_exceeded_time=None) or app
+                    self.resource_exceeded_since.pop(app["name"], None)
+                    self.handle_terminated(app)
+                    continue
+
+                window.add(current_time, cpu_percent, policy.cpu_threshold, policy.cpu_threshold_duration)
+
+                # An app that has stayed up long enough earns back its restart budget
+                stable = False
+                if process_count > 0 and self.restart_governor.engaged(app):
+                    with self.apps.edit(app_name) as current:
+                        stable = current is not None and self.restart_governor.running(current, current_time)
+                        app = current or app
+                if stable:
+                    self.restart_holds.pop(app["name"], None)
+                    self.log_message(f"INFO: {app['name']} stable for {self.restart_stable_period:.0f}s - restart backoff and circuit breaker reset")
+                    self.save_monitored_apps()
+
+                # If this is the first sample over the threshold, start the warning
+                if cpu_percent > policy.cpu_threshold and app.get("threshold_exceeded_time") is None:
+                    app = self.apps.update(app_name, threshold_exceeded_time=current_time) or app
+                    self.log_message(f"WARNING: {app['name']} CPU usage: {cpu_percent:.1f}% (exceeds {policy.cpu_threshold}%) - Starting threshold timer")
+
+                # The warning only ends once no sample in the window is over the threshold,
+                # so a single low sample no longer resets it
+                elif app.get("threshold_exceeded_time") is not None and window.over_count == 0:
+                    app = self.apps.update(app_name, threshold_exceeded_time=None) or app
+                    self.log_message(f"INFO: {app['name']} CPU usage normalized: {cpu_percent:.1f}% (below {policy.cpu_threshold}%)")
+
+                if app.get("threshold_exceeded_time") is not None:
+                    # Restart once the warning has lasted the whole duration, the window covers it
+                    # and the time-weighted samples meet the restart predicates
+                    exceeded_for = current_time - app["threshold_exceeded_time"]
+                    if (exceeded_for >= policy.cpu_threshold_duration and window.full(current_time, policy.cpu_threshold_duration)
+                            and self.window_predicates_met(window, policy)):
+                        # A held-back restart keeps the warning, so it goes ahead once the governor allows
+                        if self.schedule_restart(app, self.restart_app, f"high CPU usage ({cpu_percent:.1f}%)"):
+                            self.log_message(f"CRITICAL: {app['name']} CPU over {policy.cpu_threshold}% for {policy.cpu_threshold_duration}s ({window.describe()}) - Restarting")
+                            # Reset the timer after restart
+                            app = self.apps.update(app_name, threshold_exceeded_time=None) or app
+                            window.reset()
+                    elif cpu_percent > policy.cpu_threshold and app["threshold_exceeded_time"] != current_time:
+                        remaining_time = max(0.0, policy.cpu_threshold_duration - exceeded_for)
+                        self.log_message(f"WARNING: {app['name']} CPU usage: {cpu_percent:.1f}% (exceeds {policy.cpu_threshold}%) - {window.describe()}, {remaining_time:.1f}s remaining in window")
+
+                # Update status if app is running normally
+                elif process_count > 0 and app["status"] in ["Terminated", "Restarting", "Backoff", "Circuit Open"]:
+                    with self.apps.edit(app_name) as current:
+                        # A restart may have moved it on since our snapshot
+                        if current is not None and current.status == app["status"]:
+                            current.status = "Active"
+
+                if self.resource_metrics_enabled and not self.restart_executor.is_pending(app["name"]):
+                    self.check_resource_limits(app, policy, current_time)
+
+            except Exception as e:
+                self.log_message(f"Error checking {app['name']}: {str(e)}")
+                logging.error(f"Error checking {app['name']}: {str(e)}")
+
+        # Keep a bounded history for trend charts and post-incident review
+        enabled_apps = [self.apps.get(app["name"]) or app for app in enabled_apps]
+        now = time.time()
+        for app in enabled_apps:
+            self.metrics.record(app["name"], now, app["last_cpu"], usage[app["name"]][1], app["status"])
+        if self.history_enabled:
+            try:
+                self.history.append([(now, app["name"], app["last_cpu"], usage[app["name"]][1], app["status"], 0)
+                                     for app in enabled_apps])
+            except Exception as e:
+                logging.error(f"Error writing CPU history: {str(e)}")
+
+        # Sample faster while a restart decision is pending and back off while idle.
+        # This runs on the executor, so the scheduler is updated on the loop thread
+        # (ahead of the monitor loop resuming from this call)
+        if app_names is not None:
+            for app in enabled_apps:
+                warning = app.get("threshold_exceeded_time") is not None or app["name"] in self.resource_exceeded_since
+                # A first sample of new processes reads 0% for lack of a baseline, which says nothing about idleness
+                resources = self.app_resources.get(app["name"])
+                idle = (resources is not None and resources.baseline and app["last_cpu"] < self.policy_for(app).cpu_threshold / 2
+                        and app["status"] not in ["Terminated", "Restarting", "Backoff"])
+                self.engine_loop.call_soon(self.scheduler.reschedule, app["name"], now, warning, idle)
+
+        # Update UI
+        self.apps_updated()
+
+    def handle_terminated(self, app):
+        """Mark an app as terminated and queue its auto-restart (once per termination)"""
+        with self.apps.lock:
+            current = self.apps.get(app["name"])
+            if current is None or current["status"] == "Terminated" or self.restart_executor.is_pending(app["name"]):
+                return
+            # Apps whose restart is being held back come through here on every check
+            already_detected = current["status"] in ["Backoff", "Circuit Open"]
+            with self.apps.edit(app["name"]) as app:
+                app.status = "Terminated"
+                self.restart_governor.stopped(app)
+
+        if not already_detected:
+            self.log_message(f"DETECTED: {app['name']} has been terminated")
+            self.record_history_event(app, "terminated")
+        self.schedule_restart(app, self.restart_terminated_app)
+
+    def record_history_event(self, app, event: str):
+        if not self.history_enabled:
+            return
+        try:
+            self.history.record_event(app["name"], event, app.get("last_cpu", 0.0), app["status"])
+        except Exception as e:
+            logging.error(f"Error writing CPU history: {str(e)}")
+
+    def on_process_exit(self, pid: int):
+        """Called from the exit watcher (on the engine executor) as soon as a monitored process exits"""
+        if not self.monitoring or self.paused:
+            return
+
+        app_names = [app_name for app_name in self.process_index.apps_for_pid(pid)
+                     if app_name in self.app_policies and self.app_policies[app_name].auto_restart_enabled]
+        if not app_names:
+            return
+        self.process_index.refresh()
+
+        for app in self.monitored_apps:
+            # The app is only terminated once its last process is gone. The exited PID itself
+            # can still be listed until its parent reaps it, so it never counts as remaining.
+            if app["name"] not in app_names:
+                continue
+            if not [record for record in self.process_index.records_for(app["name"]) if record.pid != pid]:
+                app = self.apps.update(app["name"], last_cpu=0.0) or app
+                self.handle_terminated(app)
+                self.apps_updated()
+
+    def window_predicates_met(self, window: ThresholdWindow, policy: AppPolicy) -> bool:
+        """Check an app's restart predicates against its threshold window"""
+        if policy.window_min_fraction_over is not None and window.fraction_over() < policy.window_min_fraction_over:
+            return False
+        if policy.window_mean_threshold is not None and window.mean() <= policy.window_mean_threshold:
+            return False
+        if policy.window_p95_threshold is not None and window.p95() <= policy.window_p95_threshold:
+            return False
+        return True
+
+    def get_app_cpu_usage_detailed(self, app_name: str) -> Tuple[float, int]:
+        return self.get_apps_cpu_usage([app_name])[app_name]
+
+    def get_apps_cpu_usage(self, app_names: List[str]) -> Dict[str, Tuple[float, int]]:
+        """Aggregate CPU usage and process count for several apps from the process index
+
+        Memory, handle, thread and I/O totals from the same pass are kept in app_resources.
+        """
+        self.process_index.refresh()
+        include_children = {app["name"]: app.get("include_children", self.include_child_processes)
+                            for app in self.monitored_apps}
+        matches = {app_name: self.process_index.records_for(app_name, include_children.get(app_name, False))
+                   for app_name in app_names}
+
+        # Sample every matched process once, without sleeping, from the deltas since the last tick
+        samples = self.process_index.sample([record for records in matches.values() for record in records],
+                                            self.resource_metrics_enabled, self.uss_metrics_enabled)
+
+        usage = {}
+        for app_name, records in matches.items():
+            total = ResourceSample()
+            process_count = 0
+
+            for record in records:
+                sample = samples.get(record.pid)
+                if sample is None:
+                    continue
+
+                total.add(sample)
+                # Only the processes the app's rule matches keep it alive; helpers left behind
+                # by an exited app still count towards its CPU but don't stop the auto-restart
+                if app_name in record.apps:
+                    process_count += 1
+
+                # Log for debugging
+                if sample.cpu > 0:
+                    # Every busy process on every tick - too chatty for cpu_monitor.log
+                    self.log_message(f"Process {record.name} (PID: {record.pid}) CPU: {sample.cpu:.1f}%", logging.DEBUG)
+
+            usage[app_name] = (total.cpu, process_count)
+            self.app_resources[app_name] = total
+
+        return usage
+
+    def resource_breaches(self, resources: ResourceSample, policy: AppPolicy) -> List[str]:
+        """Describe every resource limit in the app's policy that its current usage exceeds"""
+        mb = 1024 * 1024
+        checks = [
+            ("RSS", resources.rss / mb, policy.rss_threshold_mb, "MB"),
+            ("USS", (resources.uss or 0) / mb, policy.uss_threshold_mb, "MB"),
+            ("handles", resources.fds, policy.fd_threshold, ""),
+            ("threads", resources.threads, policy.thread_threshold, ""),
+            ("I/O", (resources.read_rate + resources.write_rate) / mb, policy.io_threshold_mb_s, "MB/s"),
+        ]
+        return [f"{label} {value:.0f}{unit} > {limit}{unit}" for label, value, limit, unit in checks
+                if limit is not None and value > limit]
+
+    def check_resource_limits(self, app, policy: AppPolicy, current_time: float) -> None:
+        """Restart an app whose memory, handles, threads or I/O stay over its limits for resource_threshold_duration"""
+        resources = self.app_resources.get(app["name"])
+        breaches = self.resource_breaches(resources, policy) if resources is not None else []
+
+        if not breaches:
+            if self.resource_exceeded_since.pop(app["name"], None) is not None:
+                self.log_message(f"INFO: {app['name']} resource usage back within limits")
+            return
+
+        since = self.resource_exceeded_since.get(app["name"])
+        if since is None:
+            self.resource_exceeded_since[app["name"]] = current_time
+            self.log_message(f"WARNING: {app['name']} {', '.join(breaches)} - Starting resource timer")
+        elif current_time - since >= policy.resource_threshold_duration:
+            if self.schedule_restart(app, self.restart_app, f"resource limits ({', '.join(breaches)})"):
+                self.log_message(f"CRITICAL: {app['name']} {', '.join(breaches)} for {policy.resource_threshold_duration}s - Restarting")
+                del self.resource_exceeded_since[app["name"]]
+
+    def schedule_restart(self, app, restart_method, *args) -> bool:
+        """Hand a restart to the restart executor so the monitoring tick keeps its cadence
+
+        The restart governor may hold it back (backoff or open circuit); a terminated
+        app then shows that as its status and is retried on a later check. args are
+        passed on to restart_method after the app. Returns whether the restart was
+        submitted.
+        """
+        now = time.time()
+        hold = None
+        # The governor's decision and its state change are published together with the record
+        with self.apps.edit(app["name"]) as current:
+            if current is None:
+                return False  # Removed in the meantime
+            allowed, reason = self.restart_governor.check(current, now)
+            if not allowed:
+                hold = "Circuit Open" if current.restart_governor["circuit"] == "open" else "Backoff"
+                if restart_method == self.restart_terminated_app:
+                    current.status = hold
+            else:
+                submitted = self.restart_executor.submit(app["name"], restart_method, app, *args)
+                if submitted:
+                    self.restart_governor.record_restart(current, now)
+
+        if hold is not None:
+            if self.restart_holds.get(app["name"]) != hold:
+                self.restart_holds[app["name"]] = hold
+                self.log_message(f"Holding back restart of {app['name']}: {reason}")
+                if hold == "Circuit Open":
+                    self.notify_user("Restarts Paused",
+                                     f"{app['name']} keeps needing restarts - automatic restarts paused ({reason})")
+                self.save_monitored_apps()
+            if restart_method == self.restart_terminated_app:
+                self.apps_updated()
+            return False
+
+        self.restart_holds.pop(app["name"], None)
+        if not submitted:
+            self.log_message(f"Restart of {app['name']} already in progress - skipping")
+            return False
+        self.save_monitored_apps()
+        return True
+
+    def reset_restart_governor(self, app_name):
+        """Clear an app's restart backoff and close its circuit breaker"""
+        for app in self.monitored_apps:
+            if app["name"] == app_name:
+                self.restart_holds.pop(app_name, None)
+                with self.apps.edit(app_name) as current:
+                    if current is not None:
+                        self.restart_governor.reset(current)
+                        if current.status in ["Backoff", "Circuit Open"]:
+                            # Let the next check pick it up as a fresh termination
+                            current.status = "Active"
+                self.log_message(f"Reset restart backoff and circuit breaker for {app_name}")
+                self.apps_updated()
+                self.save_monitored_apps()
+                break
+
+    async def restart_app(self, app, reason: str):
+        """Terminate an app's processes, wait its startup_delay and start it again
+
+        reason says what triggered the restart, e.g. "high CPU usage (97.0%)",
+        and goes into the notifications.
+        """
+        try:
+            app_name = app["name"]
+            self.log_message(f"Attempting to restart {app_name}...")
+
+            procs, names = await self.engine_loop.run_blocking(self.find_restart_processes, app)
+            if procs:
+                # Ask nicely, wait only as long as the processes actually take to exit, then kill
+                outcomes = await self.engine_loop.run_blocking(terminate_processes, procs, self.terminate_timeout)
+                for pid, outcome in outcomes.items():
+                    self.log_message(f"  {names.get(pid, app_name)} (PID: {pid}): {outcome}")
+
+                lingering = [pid for pid, outcome in outcomes.items() if outcome == "still running"]
+                self.log_message(f"Terminated {len(outcomes) - len(lingering)} {app_name} process(es)")
+                if lingering:
+                    # Starting a second instance next to the old one would only make things worse
+                    app = self.apps.update(app_name, status="Restart Failed") or app
+                    self.record_history_event(app, "restart-failed")
+                    self.log_message(f"Failed to restart {app_name} - PID(s) {', '.join(map(str, lingering))} could not be stopped")
+                    return
+
+                startup_delay = self.policy_for(app).startup_delay
+                self.log_message(f"Waiting {startup_delay} seconds before restarting {app_name}...")
+                await asyncio.sleep(startup_delay)
+
+                if await self.engine_loop.run_blocking(self.launch_app, app, "restart"):
+                    with self.apps.edit(app_name) as current:
+                        if current is not None:
+                            current.restart_count += 1
+                            current.status = "Restarted"
+                            app = current
+                    self.record_history_event(app, "restart")
+                    
+                    # Send notifications
+                    self.send_all_notifications(app_name, "restart", reason)
+                    
+                    # Show notification
+                    self.notify_user("App Restarted", f"{app_name} has been restarted due to {reason}")
+                else:
+                    app = self.apps.update(app_name, status="Restart Failed") or app
+                    self.record_history_event(app, "restart-failed")
+                    self.log_message(f"Failed to restart {app_name} - all methods exhausted")
+
+            else:
+                self.log_message(f"No {app_name} process(es) found to restart")
+
+        except Exception as e:
+            error_msg = f"Error restarting {app['name']}: {str(e)}"
+            self.log_message(error_msg)
+            logging.error(error_msg)
+
+    async def restart_terminated_app(self, app):
+        """Start an app whose processes are all gone, after its startup_delay"""
+        try:
+            app_name = app["name"]
+            app = self.apps.update(app_name, status="Restarting") or app
+            self.log_message(f"Auto-restarting terminated application: {app_name}")
+
+            # Apply startup delay before restarting
+            startup_delay = self.policy_for(app).startup_delay
+            if startup_delay > 0:
+                self.log_message(f"Waiting {startup_delay} seconds before restarting {app_name}...")
+                await asyncio.sleep(startup_delay)
+
+            if await self.engine_loop.run_blocking(self.launch_app, app, "auto-restart"):
+                with self.apps.edit(app_name) as current:
+                    if current is not None:
+                        current.restart_count += 1
+                        current.status = "Auto-Restarted"
+                        app = current
+                self.record_history_event(app, "auto-restart")
+                
+                # Send notifications
+                self.send_all_notifications(app_name, "auto_restart")
+                
+                # Show notification
+                self.notify_user("App Auto-Restarted",
+                                 f"{app_name} was terminated and has been automatically restarted")
+            else:
+                app = self.apps.update(app_name, status="Auto-Restart Failed") or app
+                self.record_history_event(app, "restart-failed")
+                self.log_message(f"Failed to auto-restart {app_name} - all methods exhausted")
+
+        except Exception as e:
+            error_msg = f"Error auto-restarting {app['name']}: {str(e)}"
+            self.log_message(error_msg)
+            logging.error(error_msg)
+            self.apps.update(app["name"], status="Auto-Restart Failed")
+
+    def find_restart_processes(self, app) -> Tuple[List[psutil.Process], Dict[int, str]]:
+        """Processes a restart has to stop, with their names by PID
+
+        Matches by app name/exe plus the configured process name, along with
+        everything they started so no helpers are left orphaned.
+        """
+        app_name = app["name"]
+        self.process_index.refresh()
+        include_children = app.get("include_children", self.include_child_processes)
+        records = {record.pid: record for record in self.process_index.records_for(app_name, include_children)}
+        for record in self.process_index.find(app.get("process_name", app_name)):
+            records.setdefault(record.pid, record)
+
+        procs = []
+        for record in records.values():
+            proc = record.process()
+            if proc is None:
+                continue
+
+            self.log_message(f"Found process: {record.name} (PID: {record.pid})")
+            procs.append(proc)
+
+        return procs, {record.pid: record.name for record in records.values()}
+
+    def launch_app(self, app, action: str = "restart") -> bool:
+        """Start an app from its executable path, the cached lookup or its name (action: "restart" or "auto-restart")"""
+        app_name = app["name"]
+        app = self.apps.get(app_name) or app
+        done = "Restarted" if action == "restart" else "Auto-restarted"
+
+        # First try executable path if available
+        if app.get("executable_path") and os.path.exists(app["executable_path"]):
+            try:
+                launch_detached([app["executable_path"]], self.engine_loop)
+                self.log_message(f"{done} {app_name} from executable path: {app['executable_path']}")
+                return True
+            except Exception as e:
+                self.log_message(f"Failed to {action} from executable path: {str(e)}")
+
+        # If executable path failed, try common locations (cached). Not PATH or running
+        # processes - the process we just killed may well be an interpreter's
+        path = self.find_common_path(app_name)
+        if path and path != app.get("executable_path"):
+            try:
+                launch_detached([path], self.engine_loop)
+                self.log_message(f"{done} {app_name} from common path: {path}")
+                # Update the executable path for future use
+                self.apps.update(app_name, executable_path=path)
+                return True
+            except Exception as e:
+                self.executable_cache.invalidate(app_name)
+                self.log_message(f"Failed to {action} from {path}: {str(e)}")
+
+        # Last resort: try to start by name
+        try:
+            launch_detached([app_name], self.engine_loop)
+            self.log_message(f"{done} {app_name} by name (last resort)")
+            return True
+        except Exception as e:
+            self.log_message(f"Failed to {action} {app_name} by name: {str(e)}")
+            return False
+
+    def find_common_path(self, app_name):
+        """Look an app up in its usual install locations (cached, including misses)"""
+        cached, path = self.executable_cache.get(app_name)
+        if cached:
+            return path
+
+        path = next((path for path in common_executable_paths(app_name) if os.path.exists(path)), None)
+        self.executable_cache.put(app_name, path)
+        return path
+
+    def find_executable_path(self, app_name, refresh_index: bool = True):
+        """Find the executable path for a given application name"""
+        try:
+            # First check if it's already in PATH
+            try:
+                result = subprocess.run(['where', app_name], capture_output=True, text=True, shell=True)
+                if result.returncode == 0:
+                    paths = result.stdout.strip().splitlines()
+                    if paths:
+                        return paths[0]  # Return the first found path
+            except:
+                pass
+            
+            # Check common installation directories
+            path = self.find_common_path(app_name)
+            if path:
+                return path
+            
+            # Try to find by searching running processes
+            if refresh_index:
+                self.process_index.refresh()
+            for record in self.process_index.find(app_name):
+                if record.exe and os.path.exists(record.exe):
+                    return record.exe
+            
+            return None
+            
+        except Exception as e:
+            self.log_message(f"Error finding executable for {app_name}: {str(e)}")
+            return None
+
+    def discover_executable_paths(self):
+        """Automatically discover and update executable paths for all monitored apps"""
+        print("DEBUG: discover_executable_paths method called")  # Immediate console output
+        self.log_message("Discovering executable paths for monitored applications...")
+
+        apps = [app for app in self.monitored_apps if not app.get("executable_path")]
+        if apps:
+            # One process scan for everyone, then resolve all apps concurrently
+            self.process_index.refresh()
+            with ThreadPoolExecutor(max_workers=min(8, len(apps)), thread_name_prefix="discover") as pool:
+                exe_paths = list(pool.map(lambda app: self.find_executable_path(app["name"], refresh_index=False), apps))
+
+            for app, exe_path in zip(apps, exe_paths):
+                if exe_path:
+                    self.apps.update(app["name"], executable_path=exe_path)
+                    self.log_message(f"Found executable for {app['name']}: {exe_path}")
+                else:
+                    self.log_message(f"Could not find executable for {app['name']}")
+        
+        # Save the updated configuration
+        self.save_monitored_apps()
+        self.apps_updated()
+        self.log_message("Executable discovery completed!")
+
+    def debug_cpu_monitoring(self):
+        """Debug CPU monitoring for all apps"""
+        print("DEBUG: debug_cpu_monitoring method called")  # Immediate console output
+        self.log_message("=== DEBUG: CPU Monitoring Test ===")
+        self.log_message(f"Current settings: CPU threshold: {self.cpu_threshold}%, Duration: {self.cpu_threshold_duration}s")
+        
+        usage = self.get_apps_cpu_usage([app["name"] for app in self.monitored_apps if app.get("enabled", True)])
+        for app in self.monitored_apps:
+            if app.get("enabled", True):
+                self.log_message(f"Testing CPU monitoring for: {app['name']}")
+                if app.get("policy"):
+                    policy = self.policy_for(app)
+                    self.log_message(f"  Policy: CPU threshold: {policy.cpu_threshold}%, Duration: {policy.cpu_threshold_duration}s, "
+                                     f"Startup delay: {policy.startup_delay}s, Auto-restart: {policy.auto_restart_enabled}")
+                cpu_percent, process_count = usage[app["name"]]
+                self.log_message(f"  Found {process_count} processes, Total CPU: {cpu_percent:.1f}%")
+                
+                # Update the app's CPU value for display
+                self.apps.update(app["name"], last_cpu=cpu_percent)
+                
+                # Check if we can find the process by name
+                found_by_name = self.process_index.find(app["name"])
+                if found_by_name:
+                    self.log_message(f"  Found by name: {found_by_name[0].name} (PID: {found_by_name[0].pid})")
+                else:
+                    self.log_message(f"  WARNING: Could not find process by name '{app['name']}'")
+                
+                # Check if we can find the process by process_name
+                if app.get("process_name"):
+                    found_by_process_name = self.process_index.find(app["process_name"])
+                    if found_by_process_name:
+                        self.log_message(f"  Found by process_name: {found_by_process_name[0].name} (PID: {found_by_process_name[0].pid})")
+                    else:
+                        self.log_message(f"  WARNING: Could not find process by process_name '{app['process_name']}'")
+        
+        # Update the display
+        self.apps_updated()
+        self.log_message("=== DEBUG: CPU Monitoring Test Complete ===")
+
+    def set_executable_path(self, app_name, executable_path):
+        """Manually set the executable path for a specific application"""
+        for app in self.monitored_apps:
+            if app["name"] == app_name:
+                if os.path.exists(executable_path):
+                    self.apps.update(app_name, executable_path=executable_path)
+                    self.executable_cache.invalidate(app_name)
+                    self.log_message(f"Set executable path for {app_name}: {executable_path}")
+                    self.save_monitored_apps()
+                    self.apps_updated()
+                    return True
+                else:
+                    self.log_message(f"Executable path does not exist: {executable_path}")
+                    return False
+        return False
+
+    def reset_threshold_timer(self, app_name):
+        """Reset the threshold timer for a specific application"""
+        for app in self.monitored_apps:
+            if app["name"] == app_name:
+                if app.get("threshold_exceeded_time") is not None or app_name in self.resource_exceeded_since:
+                    self.apps.update(app_name, threshold_exceeded_time=None)
+                    if app_name in self.threshold_windows:
+                        self.threshold_windows[app_name].reset()
+                    self.resource_exceeded_since.pop(app_name, None)
+                    self.log_message(f"Reset threshold timer for {app_name}")
+                    self.apps_updated()
+                    self.save_monitored_apps()
+                else:
+                    self.log_message(f"No active threshold timer for {app_name}")
+                break
+
+    def save_settings(self):
+        """Queue a write of settings.json (see JsonFile)"""
+        self.settings_file.save()
+
+    def settings_dict(self) -> Dict:
+        return {
+            "cpu_threshold": self.cpu_threshold,
+            "check_interval": self.check_interval,
+            "fast_check_interval": self.fast_check_interval,
+            "max_check_interval": self.max_check_interval,
+            "startup_delay": self.startup_delay,
+            "monitoring_startup_delay": self.monitoring_startup_delay,
+            "cpu_threshold_duration": self.cpu_threshold_duration,
+            "window_min_fraction_over": self.window_min_fraction_over,
+            "window_mean_threshold": self.window_mean_threshold,
+            "window_p95_threshold": self.window_p95_threshold,
+            "restart_backoff_base": self.restart_backoff_base,
+            "restart_backoff_max": self.restart_backoff_max,
+            "restart_budget": self.restart_budget,
+            "restart_budget_window": self.restart_budget_window,
+            "restart_stable_period": self.restart_stable_period,
+            "restart_breaker_cooldown": self.restart_breaker_cooldown,
+            "executable_cache_ttl": self.executable_cache_ttl,
+            "executable_negative_ttl": self.executable_negative_ttl,
+            "terminate_timeout": self.terminate_timeout,
+            "include_child_processes": self.include_child_processes,
+            "resource_metrics_enabled": self.resource_metrics_enabled,
+            "uss_metrics_enabled": self.uss_metrics_enabled,
+            "rss_threshold_mb": self.rss_threshold_mb,
+            "uss_threshold_mb": self.uss_threshold_mb,
+            "fd_threshold": self.fd_threshold,
+            "thread_threshold": self.thread_threshold,
+            "io_threshold_mb_s": self.io_threshold_mb_s,
+            "resource_threshold_duration": self.resource_threshold_duration,
+            "auto_restart_enabled": self.auto_restart_enabled,
+            "windows_notifications_enabled": self.windows_notifications_enabled,
+            "email_notifications_enabled": self.email_notifications_enabled,
+            "sms_notifications_enabled": self.sms_notifications_enabled,
+            "email_smtp_server": self.email_smtp_server,
+            "email_smtp_port": self.email_smtp_port,
+            "email_username": self.email_username,
+            "email_password": self.email_password,
+            "email_recipients": self.email_recipients,
+            "sms_api_key": self.sms_api_key,
+            "sms_phone_numbers": self.sms_phone_numbers,
+            "email_use_tls": self.email_use_tls,
+            "notification_digest_window": self.notification_digest_window,
+            "email_min_interval": self.email_min_interval,
+            "sms_min_interval": self.sms_min_interval,
+            "process_collector": self.process_collector,
+            "max_concurrent_restarts": self.max_concurrent_restarts,
+            "console_log_enabled": self.console_log_enabled,
+            "log_max_lines": self.log_max_lines,
+            "history_enabled": self.history_enabled,
+            "history_max_mb": self.history_max_mb,
+            "history_files": self.history_files
+        }
+
+    def load_settings(self):
+        try:
+            if os.path.exists("settings.json"):
+                with open("settings.json", "r") as f:
+                    settings = json.load(f)
+                    self.cpu_threshold = settings.get("cpu_threshold", 50.0)
+                    self.check_interval = settings.get("check_interval", 5.0)
+                    self.fast_check_interval = settings.get("fast_check_interval", 1.0)
+                    self.max_check_interval = settings.get("max_check_interval", 60.0)
+                    self.startup_delay = settings.get("startup_delay", 3.0)
+                    self.monitoring_startup_delay = settings.get("monitoring_startup_delay", 10.0)
+                    self.cpu_threshold_duration = settings.get("cpu_threshold_duration", 30.0)
+                    self.window_min_fraction_over = settings.get("window_min_fraction_over", 0.8)
+                    self.window_mean_threshold = settings.get("window_mean_threshold")
+                    self.window_p95_threshold = settings.get("window_p95_threshold")
+                    self.restart_backoff_base = settings.get("restart_backoff_base", 5.0)
+                    self.restart_backoff_max = settings.get("restart_backoff_max", 300.0)
+                    self.restart_budget = max(1, int(settings.get("restart_budget", 5)))
+                    self.restart_budget_window = settings.get("restart_budget_window", 600.0)
+                    self.restart_stable_period = settings.get("restart_stable_period", 300.0)
+                    self.restart_breaker_cooldown = settings.get("restart_breaker_cooldown", 3600.0)
+                    self.executable_cache_ttl = settings.get("executable_cache_ttl", 3600.0)
+                    self.executable_negative_ttl = settings.get("executable_negative_ttl", 300.0)
+                    self.terminate_timeout = settings.get("terminate_timeout", 5.0)
+                    self.include_child_processes = settings.get("include_child_processes", True)
+                    self.resource_metrics_enabled = settings.get("resource_metrics_enabled", True)
+                    self.uss_metrics_enabled = settings.get("uss_metrics_enabled", False)
+                    self.rss_threshold_mb = settings.get("rss_threshold_mb")
+                    self.uss_threshold_mb = settings.get("uss_threshold_mb")
+                    self.fd_threshold = settings.get("fd_threshold")
+                    self.thread_threshold = settings.get("thread_threshold")
+                    self.io_threshold_mb_s = settings.get("io_threshold_mb_s")
+                    self.resource_threshold_duration = settings.get("resource_threshold_duration", 60.0)
+                    self.auto_restart_enabled = settings.get("auto_restart_enabled", True)
+                    self.windows_notifications_enabled = settings.get("windows_notifications_enabled", True)
+                    self.email_notifications_enabled = settings.get("email_notifications_enabled", False)
+                    self.sms_notifications_enabled = settings.get("sms_notifications_enabled", False)
+                    self.email_smtp_server = settings.get("email_smtp_server", "smtp.gmail.com")
+                    self.email_smtp_port = settings.get("email_smtp_port", 587)
+                    self.email_username = settings.get("email_username", "")
+                    self.email_password = settings.get("email_password", "")
+                    self.email_recipients = settings.get("email_recipients", [])
+                    self.sms_api_key = settings.get("sms_api_key", "")
+                    self.sms_phone_numbers = settings.get("sms_phone_numbers", [])
+                    self.email_use_tls = settings.get("email_use_tls", True)
+                    self.notification_digest_window = settings.get("notification_digest_window", 30.0)
+                    self.email_min_interval = settings.get("email_min_interval", 60.0)
+                    self.sms_min_interval = settings.get("sms_min_interval", 300.0)
+                    self.process_collector = settings.get("process_collector", "psutil")
+                    self.max_concurrent_restarts = settings.get("max_concurrent_restarts", 2)
+                    self.console_log_enabled = settings.get("console_log_enabled", True)
+                    self.log_max_lines = max(1, int(settings.get("log_max_lines", 1000)))
+                    self.history_enabled = settings.get("history_enabled", True)
+                    self.history_max_mb = settings.get("history_max_mb", 16)
+                    self.history_files = max(0, int(settings.get("history_files", 4)))
+        except Exception as e:
+            logging.error(f"Error loading settings: {str(e)}")
+
+    def save_monitored_apps(self):
+        """Queue a write of monitored_apps.json (see JsonFile)"""
+        self.apps_file.save()
+
+    def load_monitored_apps(self):
+        try:
+            if os.path.exists("monitored_apps.json"):
+                with open("monitored_apps.json", "r") as f:
+                    # Missing fields get their defaults from AppState
+                    self.apps.replace([AppState.from_dict(app) for app in json.load(f)])
+                    self.monitored_apps_changed()
+                    self.apps_updated()
+        except Exception as e:
+            logging.error(f"Error loading monitored apps: {str(e)}")
+
+    def send_windows_notification(self, title: str, message: str) -> None:
+        """Send Windows toast notification
+
+        MessageBoxW blocks until the user dismisses it, so the dialogs are shown
+        one after another by their own daemon thread rather than on the
+        engine's executor (which sampling and restarts share).
+        """
+        if not self.windows_notifications_enabled:
+            return
+        if self.windows_dialogs is None:
+            self.windows_dialogs = queue.Queue()
+            threading.Thread(target=self.show_windows_dialogs, name="windows-notifications", daemon=True).start()
+        self.windows_dialogs.put((title, message))
+
+    def show_windows_dialogs(self) -> None:
+        while True:
+            title, message = self.windows_dialogs.get()
+            try:
+                # Use Windows 10/11 toast notifications
+                import winsound
+                import ctypes
+                from ctypes import wintypes
+                
+                # Play notification sound
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+                
+                # Show Windows notification
+                ctypes.windll.user32.MessageBoxW(0, message, title, 0x40)  # 0x40 = MB_ICONINFORMATION
+                
+            except Exception as e:
+                self.log_message(f"Failed to send Windows notification: {str(e)}")
+
+    def send_email_notification(self, subject: str, message: str) -> None:
+        """Send email notification"""
+        try:
+            if not self.email_notifications_enabled or not self.email_username:
+                return
+                
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+
+            msg = MIMEMultipart()
+            msg['From'] = self.email_username
+            msg['To'] = ", ".join(self.email_recipients)
+            msg['Subject'] = subject
+            
+            msg.attach(MIMEText(message, 'plain'))
+            
+            # Reuses the connection from the previous email when the server hasn't dropped it
+            text = msg.as_string()
+            self.smtp_session.send(self.email_smtp_server, self.email_smtp_port, self.email_username,
+                                   self.email_password, self.email_use_tls, self.email_username,
+                                   self.email_recipients, text)
+            
+            self.log_message(f"Email notification sent to {len(self.email_recipients)} recipients")
+            
+        except Exception as e:
+            self.log_message(f"Failed to send email notification: {str(e)}")
+
+    def send_sms_notification(self, message: str) -> None:
+        """Send SMS notification using Twilio API"""
+        try:
+            if not self.sms_notifications_enabled or not self.sms_api_key:
+                return
+                
+            # Using Twilio API (you'll need to install: pip install twilio)
+            from twilio.rest import Client
+            
+            # Twilio credentials (you'll need to set these up)
+            account_sid = self.sms_api_key  # This should be your Twilio Account SID
+            auth_token = ""  # You'll need to add this to settings
+            
+            # Build the client once and keep it until the credentials change
+            if self.sms_client is None or self.sms_client[0] != (account_sid, auth_token):
+                self.sms_client = ((account_sid, auth_token), Client(account_sid, auth_token))
+            client = self.sms_client[1]
+            
+            for phone_number in self.sms_phone_numbers:
+                message_obj = client.messages.create(
+                    body=message,
+                    from_='+1234567890',  # Your Twilio phone number
+                    to=phone_number
+                )
+                
+            self.log_message(f"SMS notification sent to {len(self.sms_phone_numbers)} numbers")
+            
+        except ImportError:
+            self.log_message("Twilio not installed. Install with: pip install twilio")
+        except Exception as e:
+            self.log_message(f"Failed to send SMS notification: {str(e)}")
+
+    def send_all_notifications(self, app_name: str, restart_type: str, reason: str = "") -> None:
+        """Send all enabled notifications for app restart ("restart" for one we triggered, with its reason)"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        if restart_type == "restart":
+            title = f"App Restarted - {app_name}"
+            message = f"{app_name} was restarted due to {reason} at {timestamp}"
+        else:
+            title = f"App Auto-Restarted - {app_name}"
+            message = f"{app_name} was automatically restarted after being terminated at {timestamp}"
+        
+        # Queue for the channel workers - they batch, rate-limit and send without blocking us
+        if self.windows_notifications_enabled:
+            self.notification_channels["windows"].post(title, message)
+        
+        if self.email_notifications_enabled:
+            self.notification_channels["email"].post(title, message)
+        
+        if self.sms_notifications_enabled:
+            self.notification_channels["sms"].post(title, message)
+
+    def close_notifications(self) -> None:
+        """Send anything still batched and close the SMTP session"""
+        for channel in self.notification_channels.values():
+            channel.close()
+
+
+def run_headless() -> int:
+    """Run the monitoring engine as a console daemon until SIGINT/SIGTERM"""
+    engine = MonitorEngine()
+    engine.load_monitored_apps()
+    engine.log_message(f"CPU Monitor v{APP_VERSION} running headless")
+
+    if not any(app.get("enabled", True) for app in engine.monitored_apps):
+        engine.log_message("No apps configured for monitoring - add them to monitored_apps.json")
+        return 1
+
+    stop_requested = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop_requested.set())
+
+    if engine.monitoring_startup_delay > 0:
+        engine.log_message(f"Starting monitoring in {engine.monitoring_startup_delay} seconds to allow CPU to normalize...")
+    engine.start_engine(engine.monitoring_startup_delay)
+    while not stop_requested.wait(1.0):
+        pass
+
+    engine.save_settings()
+    engine.save_monitored_apps()
+    engine.shutdown()
+    engine.log_message("Stopped CPU monitoring")
+    return 0
@@ -2,9 +2,20 @@
 """
 CPU Monitor Launcher Script
 Launches the consolidated CPU Monitor application
+
+Usage:
+    python run_cpu_monitor_main.py             # Tk GUI
+    python run_cpu_monitor_main.py --headless  # console daemon, no Tk
 """
 
+import sys
+
 if __name__ == "__main__":
+    if "--headless" in sys.argv[1:]:
+        # The daemon never imports tkinter, so it also runs on servers without a display
+        from cpu_monitor_core import run_headless
+        sys.exit(run_headless())
+
     try:
         from cpu_monitor1 import main
         main()